@@ -1,18 +1,144 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from typing import Any, Callable, Optional, TypeVar
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from starlette.concurrency import run_in_threadpool
+
+from app.services.metrics import METRICS_ENABLED, TimedAsyncAdaptedQueuePool, TimedQueuePool, instrument_engine
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+psycopg2://postgres:postgres@db:5432/tako_tasks")
+# "sync" runs ORM work on threadpool threads; "async" runs it on an AsyncSession (asyncpg / aiosqlite).
+DB_MODE = os.getenv("DB_MODE", "sync").strip().lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in {"1", "true", "yes"}
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+T = TypeVar("T")
+
+
+def _async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def _pool_options(url: str, is_async: bool = False) -> dict:
+    if url.startswith("sqlite"):
+        return {}
+    options = {"poolclass": TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool} if METRICS_ENABLED else {}
+    return {
+        **options,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
 
-engine = create_engine(DATABASE_URL, echo=False, future=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
+# Task counters and the Slack user directory are kept with INSERT ... ON CONFLICT upserts.
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _check_backend(url: str) -> None:
+    # Fails the process at import instead of on the first write that needs an upsert.
+    backend = make_url(url).get_backend_name()
+    if backend not in UPSERT_INSERTS:
+        raise RuntimeError(f"Unsupported database {backend!r}: Tako Tasks runs on PostgreSQL or SQLite")
+
+
+_check_backend(DATABASE_URL)
+if DB_MODE == "async":
+    _check_backend(ASYNC_DATABASE_URL)
+
+engine = create_engine(DATABASE_URL, echo=False, future=True, **_pool_options(DATABASE_URL))
+instrument_engine(engine, "sync")
+# expire_on_commit=False: services return objects after their single commit without a reload query.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine, future=True)
+
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
 
 Base = declarative_base()
 
 
+def upsert_insert(db: Session):
+    """``insert`` for the session's dialect, with ``on_conflict_do_update``."""
+    return UPSERT_INSERTS[db.get_bind().dialect.name]
+
+
+def get_async_engine() -> AsyncEngine:
+    """Create the async engine on first use so sync deployments never import a driver for it."""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL, echo=False, **_pool_options(ASYNC_DATABASE_URL, is_async=True)
+        )
+        instrument_engine(_async_engine.sync_engine, "async")
+        _async_session_factory = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
+        )
+    return _async_engine
+
+
+class Database:
+    """Per-request database handle handed to routes.
+
+    ORM work is written once as plain functions taking a ``Session``;
+    ``run`` executes them on a threadpool thread (sync mode) or on the
+    AsyncSession's connection via ``run_sync`` (async mode), so neither mode
+    blocks the event loop.
+    """
+
+    def __init__(self, session: Session | AsyncSession):
+        self.session = session
+
+    @property
+    def is_async(self) -> bool:
+        return isinstance(self.session, AsyncSession)
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+async def get_database():
+    if DB_MODE == "async":
+        get_async_engine()
+        async with _async_session_factory() as session:
+            yield Database(session)
+        return
+    db = SessionLocal()
+    try:
+        yield Database(db)
+    finally:
+        await run_in_threadpool(db.close)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def dispose_engines() -> None:
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+    engine.dispose()
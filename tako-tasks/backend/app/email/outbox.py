@@ -0,0 +1,145 @@
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import and_, delete, or_
+from sqlalchemy.orm import Session
+
+from app.email.sender import access_key_email
+from app.jobs.queue import backoff_seconds
+from app.models.email import EmailOutbox, EmailStatus
+
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+EMAIL_LEASE_SECONDS = int(os.getenv("EMAIL_LEASE_SECONDS", "300"))
+# Sent and failed rows are deleted this long after their last attempt.
+EMAIL_OUTBOX_RETENTION_DAYS = float(os.getenv("EMAIL_OUTBOX_RETENTION_DAYS", "7"))
+
+# Bodies can carry access keys and login tokens, so they are blanked once a row is finished.
+SCRUBBED_BODIES = {"text_body": "", "html_body": None}
+
+
+@dataclass(frozen=True)
+class ClaimedEmail:
+    id: int
+    to_email: str
+    to_name: str
+    subject: str
+    text_body: str
+    html_body: Optional[str]
+    attempts: int
+    max_attempts: int
+
+
+def enqueue_email(
+    db: Session,
+    to_email: str,
+    subject: str,
+    text_body: str,
+    html_body: Optional[str] = None,
+    to_name: str = "",
+) -> EmailOutbox:
+    """Add an email to the session; the sender worker picks it up once the caller commits."""
+    email = EmailOutbox(
+        to_email=to_email,
+        to_name=to_name,
+        subject=subject,
+        text_body=text_body,
+        html_body=html_body,
+        status=EmailStatus.pending,
+        attempts=0,
+        max_attempts=EMAIL_MAX_ATTEMPTS,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.add(email)
+    return email
+
+
+def enqueue_access_key_email(db: Session, email: str, name: str, key: str) -> EmailOutbox:
+    subject, text_body, html_body = access_key_email(name, key)
+    return enqueue_email(db, email, subject, text_body, html_body, to_name=name)
+
+
+def claim(db: Session, limit: int = 20) -> List[ClaimedEmail]:
+    """Lock up to ``limit`` due emails and mark them sending; see ``app.jobs.queue.claim``."""
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=EMAIL_LEASE_SECONDS)
+    rows = (
+        db.query(EmailOutbox)
+        .filter(
+            or_(
+                and_(EmailOutbox.status == EmailStatus.pending, EmailOutbox.next_attempt_at <= now),
+                and_(EmailOutbox.status == EmailStatus.sending, EmailOutbox.locked_at < stale),
+            )
+        )
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    claimed = []
+    for row in rows:
+        row.status = EmailStatus.sending
+        row.locked_at = now
+        row.attempts += 1
+        claimed.append(
+            ClaimedEmail(
+                row.id, row.to_email, row.to_name, row.subject, row.text_body, row.html_body,
+                row.attempts, row.max_attempts,
+            )
+        )
+    db.commit()
+    return claimed
+
+
+def mark_sent(db: Session, email_id: int) -> None:
+    now = datetime.utcnow()
+    db.query(EmailOutbox).filter(EmailOutbox.id == email_id).update(
+        {"status": EmailStatus.sent, "sent_at": now, "locked_at": None, "last_error": None, **SCRUBBED_BODIES},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def mark_failed(db: Session, email: ClaimedEmail, error: str, transient: bool) -> EmailStatus:
+    """Retry transient failures with backoff; permanent ones (and exhausted retries) end as failed."""
+    now = datetime.utcnow()
+    if transient and email.attempts < email.max_attempts:
+        values = {
+            "status": EmailStatus.pending,
+            "next_attempt_at": now + timedelta(seconds=backoff_seconds(email.attempts)),
+        }
+    else:
+        values = {"status": EmailStatus.failed, **SCRUBBED_BODIES}
+    values.update({"locked_at": None, "last_error": error[:2000]})
+    db.query(EmailOutbox).filter(EmailOutbox.id == email.id).update(values, synchronize_session=False)
+    db.commit()
+    return values["status"]
+
+
+def requeue_failed(db: Session) -> int:
+    """Retry failed emails that still have a body; scrubbed ones have to be requested again."""
+    count = (
+        db.query(EmailOutbox)
+        .filter(EmailOutbox.status == EmailStatus.failed, EmailOutbox.text_body != "")
+        .update(
+            {"status": EmailStatus.pending, "attempts": 0, "next_attempt_at": datetime.utcnow()},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return count
+
+
+def purge_finished(db: Session, now: Optional[datetime] = None) -> int:
+    """Delete sent and failed emails last attempted more than ``EMAIL_OUTBOX_RETENTION_DAYS`` ago."""
+    cutoff = (now or datetime.utcnow()) - timedelta(days=EMAIL_OUTBOX_RETENTION_DAYS)
+    result = db.execute(
+        delete(EmailOutbox)
+        .where(
+            EmailOutbox.status.in_([EmailStatus.sent, EmailStatus.failed]),
+            EmailOutbox.next_attempt_at < cutoff,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
@@ -1,11 +1,27 @@
 import os
 import smtplib
+import time
 from email.message import EmailMessage
+from typing import Optional, Tuple
+
+from app.services.metrics import external_call
 
 GMAIL_ADDRESS = os.getenv("GMAIL_ADDRESS", "").strip()
 GMAIL_APP_PASSWORD = os.getenv("GMAIL_APP_PASSWORD", "").strip()
 GMAIL_FROM_NAME = os.getenv("GMAIL_FROM_NAME", "Tako Tasks")
 
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com").strip()
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() in {"1", "true", "yes"}
+SMTP_USERNAME = os.getenv("SMTP_USERNAME", GMAIL_ADDRESS).strip()
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", GMAIL_APP_PASSWORD).strip()
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "20"))
+# Providers drop idle sessions and cap messages per session; reconnect before hitting either.
+SMTP_IDLE_SECONDS = float(os.getenv("SMTP_IDLE_SECONDS", "60"))
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+EMAIL_FROM_ADDRESS = os.getenv("EMAIL_FROM_ADDRESS", GMAIL_ADDRESS or SMTP_USERNAME).strip()
+EMAIL_FROM_NAME = os.getenv("EMAIL_FROM_NAME", GMAIL_FROM_NAME)
+
 
 PLACEHOLDER_VALUES = {
     "GMAIL_ADDRESS": {"your-gmail-address@example.com"},
@@ -42,13 +58,14 @@ def _validate_gmail_config() -> None:
         )
 
 
-def send_access_key_email(email: str, name: str, key: str) -> None:
-    _validate_gmail_config()
-    message = EmailMessage()
-    message["Subject"] = "Your Tako Tasks access key"
-    message["From"] = f"{GMAIL_FROM_NAME} <{GMAIL_ADDRESS}>"
-    message["To"] = f"{name} <{email}>"
+def validate_smtp_config() -> None:
+    """Fail fast on a half-configured Gmail setup; other SMTP hosts are taken as configured."""
+    if SMTP_HOST == "smtp.gmail.com":
+        _validate_gmail_config()
 
+
+def access_key_email(name: str, key: str) -> Tuple[str, str, str]:
+    """Return (subject, text body, html body) for an access key email."""
     html_body = f"""
         <p>Hi {name},</p>
         <p>Thanks for requesting access to Tako Tasks. Use the key below to unlock the Slack app:</p>
@@ -56,19 +73,96 @@ def send_access_key_email(email: str, name: str, key: str) -> None:
         <p>This key is single-use. Enter it on the unlock page to continue.</p>
         <p>— Tako Tasks Team</p>
     """
-    message.set_content(
+    text_body = (
         f"Hi {name},\n\n"
         "Thanks for requesting access to Tako Tasks. Use the key below to unlock the Slack app:\n"
         f"{key}\n\n"
         "This key is single-use. Enter it on the unlock page to continue.\n"
         "— Tako Tasks Team"
     )
-    message.add_alternative(html_body, subtype="html")
-
-    try:
-        with smtplib.SMTP("smtp.gmail.com", 587) as server:
-            server.starttls()
-            server.login(GMAIL_ADDRESS, GMAIL_APP_PASSWORD)
-            server.send_message(message)
-    except Exception as exc:  # pragma: no cover - log in production
-        print(f"Failed to send email: {exc}")
+    return "Your Tako Tasks access key", text_body, html_body
+
+
+def build_message(to_email: str, to_name: str, subject: str, text_body: str, html_body: Optional[str]) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = f"{EMAIL_FROM_NAME} <{EMAIL_FROM_ADDRESS}>"
+    message["To"] = f"{to_name} <{to_email}>" if to_name else to_email
+    message.set_content(text_body)
+    if html_body:
+        message.add_alternative(html_body, subtype="html")
+    return message
+
+
+def is_transient(exc: Exception) -> bool:
+    """4xx replies and dropped connections are worth retrying; 5xx replies are not."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    return isinstance(exc, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError))
+
+
+class SMTPConnection:
+    """One authenticated SMTP session reused across messages.
+
+    The session is opened lazily, recycled after ``SMTP_MAX_MESSAGES_PER_CONNECTION``
+    messages or ``SMTP_IDLE_SECONDS`` of inactivity, and reopened once if the
+    server drops it mid-send.
+    """
+
+    def __init__(self):
+        self._server: Optional[smtplib.SMTP] = None
+        self._sent = 0
+        self._last_used = 0.0
+
+    def _open(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        try:
+            if SMTP_STARTTLS:
+                server.starttls()
+            if SMTP_USERNAME and SMTP_PASSWORD:
+                server.login(SMTP_USERNAME, SMTP_PASSWORD)
+        except Exception:
+            server.close()
+            raise
+        self._sent = 0
+        return server
+
+    def _session(self) -> smtplib.SMTP:
+        stale = time.monotonic() - self._last_used > SMTP_IDLE_SECONDS
+        if self._server is not None and (stale or self._sent >= SMTP_MAX_MESSAGES_PER_CONNECTION):
+            self.close()
+        if self._server is None:
+            self._server = self._open()
+        return self._server
+
+    def send(self, message: EmailMessage) -> None:
+        for attempt in range(2):
+            try:
+                # Timed with the (re)connect, which is part of what a send costs.
+                with external_call("smtp", "send"):
+                    self._session().send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                self._server = None
+                if attempt:
+                    raise
+                continue
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException):
+                # smtplib already RSET the transaction; the session stays usable.
+                raise
+            except Exception:
+                self.close()
+                raise
+            self._sent += 1
+            self._last_used = time.monotonic()
+            return
+
+    def close(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
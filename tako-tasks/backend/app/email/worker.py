@@ -0,0 +1,107 @@
+"""Outbox email sender.
+
+Run it next to the API as its own process::
+
+    python -m app.email.worker
+
+Messages go out over one reused SMTP session, paced to ``EMAIL_RATE_PER_MINUTE``. Finished rows have their bodies blanked
+and are purged after ``EMAIL_OUTBOX_RETENTION_DAYS``.
+``--drain`` sends everything that is currently due and exits; point
+``SMTP_HOST``/``SMTP_PORT`` at ``python -m aiosmtpd -n -l localhost:1025`` to
+try it locally.
+"""
+import argparse
+import logging
+import os
+import time
+
+from app.database import SessionLocal
+from app.email import outbox
+from app.email.sender import SMTPConnection, build_message, is_transient, validate_smtp_config
+
+EMAIL_RATE_PER_MINUTE = float(os.getenv("EMAIL_RATE_PER_MINUTE", "60"))
+EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS = float(os.getenv("EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS", "3600"))
+
+logger = logging.getLogger("tako.email")
+
+
+class RateLimiter:
+    """Spaces sends evenly so a burst never exceeds the provider's per-minute quota."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next = 0.0
+
+    def wait(self) -> None:
+        now = time.monotonic()
+        if self._next > now:
+            time.sleep(self._next - now)
+            now = self._next
+        self._next = now + self.interval
+
+
+def _deliver(db, connection: SMTPConnection, limiter: RateLimiter, email: outbox.ClaimedEmail) -> None:
+    limiter.wait()
+    message = build_message(email.to_email, email.to_name, email.subject, email.text_body, email.html_body)
+    try:
+        connection.send(message)
+    except Exception as exc:
+        status = outbox.mark_failed(db, email, f"{exc.__class__.__name__}: {exc}", is_transient(exc))
+        logger.warning("Email %s to %s failed on attempt %s -> %s: %s", email.id, email.to_email, email.attempts, status.value, exc)
+    else:
+        outbox.mark_sent(db, email.id)
+
+
+def run_once(connection: SMTPConnection, limiter: RateLimiter, batch_size: int = 20) -> int:
+    """Claim and send one batch of due emails; returns how many were claimed."""
+    db = SessionLocal()
+    try:
+        emails = outbox.claim(db, limit=batch_size)
+        for email in emails:
+            _deliver(db, connection, limiter, email)
+        return len(emails)
+    finally:
+        db.close()
+
+
+def purge_finished() -> int:
+    db = SessionLocal()
+    try:
+        purged = outbox.purge_finished(db)
+    finally:
+        db.close()
+    if purged:
+        logger.info("Purged %s finished email(s) from the outbox", purged)
+    return purged
+
+
+def run_worker(batch_size: int = 20, poll_interval: float = 2.0, drain: bool = False) -> None:
+    validate_smtp_config()
+    connection = SMTPConnection()
+    limiter = RateLimiter(EMAIL_RATE_PER_MINUTE)
+    next_purge = 0.0
+    try:
+        while True:
+            if time.monotonic() >= next_purge:
+                purge_finished()
+                next_purge = time.monotonic() + EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS
+            if not run_once(connection, limiter, batch_size):
+                if drain:
+                    return
+                time.sleep(poll_interval)
+    finally:
+        connection.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Send queued Tako Tasks emails.")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--drain", action="store_true", help="Exit once no emails are due.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    run_worker(args.batch_size, args.poll_interval, args.drain)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Startup warmup and the readiness check behind ``/readyz``."""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict
+
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+from starlette.concurrency import run_in_threadpool
+
+from app.database import DB_MODE, DB_POOL_SIZE, engine, get_async_engine
+
+# Apply migrations in the lifespan hook instead of via `python -m app.schema` (handy for local runs).
+SCHEMA_AUTO_UPGRADE = os.getenv("SCHEMA_AUTO_UPGRADE", "false").lower() in {"1", "true", "yes"}
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() in {"1", "true", "yes"}
+DB_WARMUP_CONNECTIONS = int(os.getenv("DB_WARMUP_CONNECTIONS", str(DB_POOL_SIZE)))
+READINESS_TIMEOUT_SECONDS = float(os.getenv("READINESS_TIMEOUT_SECONDS", "2"))
+
+logger = logging.getLogger("tako.health")
+
+
+class _State:
+    shutting_down = False
+
+
+state = _State()
+
+
+def _warm_sync_pool(count: int) -> None:
+    # Hold all connections at once so the pool really opens ``count`` of them.
+    connections = []
+    try:
+        for _ in range(count):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+async def _warm_async_pool(count: int) -> None:
+    async_engine = get_async_engine()
+    connections = [await async_engine.connect() for _ in range(count)]
+    try:
+        await asyncio.gather(*(connection.execute(text("SELECT 1")) for connection in connections))
+    finally:
+        for connection in connections:
+            await connection.close()
+
+
+def _warm_slack() -> None:
+    from app.slack.client import get_client
+    from app.slack.templates import task_message_body, task_modal_body
+
+    get_client()
+    task_modal_body("warmup")
+    task_message_body(
+        "warmup",
+        {
+            "id": 0,
+            "title": "",
+            "description": "",
+            "assignee_user_id": "",
+            "priority": "",
+            "status": "",
+            "due_date": None,
+        },
+    )
+
+
+async def warmup() -> None:
+    """Open pooled DB connections and prime the Slack client before the first request.
+
+    Failures are logged, not raised: the process still starts and ``/readyz``
+    reports the database until it is reachable.
+    """
+    started = time.perf_counter()
+    count = max(0, DB_WARMUP_CONNECTIONS)
+    try:
+        if DB_MODE == "async":
+            await _warm_async_pool(count)
+        else:
+            await run_in_threadpool(_warm_sync_pool, count)
+    except Exception as exc:
+        logger.warning("Database warmup failed: %s", exc)
+    _warm_slack()
+    logger.info("Warmup finished in %.0f ms", (time.perf_counter() - started) * 1000)
+
+
+def _ping_sync() -> None:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+async def _ping_async() -> None:
+    async with get_async_engine().connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+def _pool_status() -> Dict[str, Any]:
+    pool = (get_async_engine().sync_engine if DB_MODE == "async" else engine).pool
+    if not isinstance(pool, QueuePool):
+        return {"class": type(pool).__name__}
+    return {"size": pool.size(), "checked_out": pool.checkedout(), "overflow": max(pool.overflow(), 0)}
+
+
+async def readiness() -> tuple[bool, Dict[str, Any]]:
+    """Whether this process should receive traffic: not shutting down and the database answers in time.
+
+    The ping checks a connection out of the pool, so an exhausted pool also
+    fails once ``READINESS_TIMEOUT_SECONDS`` pass.
+    """
+    if state.shutting_down:
+        return False, {"status": "shutting_down"}
+    started = time.perf_counter()
+    ping = _ping_async() if DB_MODE == "async" else run_in_threadpool(_ping_sync)
+    try:
+        await asyncio.wait_for(ping, timeout=READINESS_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return False, {"status": "unavailable", "database": "timeout", "pool": _pool_status()}
+    except Exception as exc:
+        return False, {"status": "unavailable", "database": exc.__class__.__name__, "pool": _pool_status()}
+    latency_ms = round((time.perf_counter() - started) * 1000, 2)
+    return True, {"status": "ready", "database": "ok", "database_ms": latency_ms, "pool": _pool_status()}
@@ -0,0 +1,61 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from app.database import Database
+from app.services import counters, directory
+from app.services.workspaces import get_workspace
+from app.slack.client import SlackAPIError, api_call
+
+SLACK_API_CALL = "slack.api_call"
+RECONCILE_TASK_COUNTERS = "tasks.reconcile_counters"
+SYNC_SLACK_USERS = directory.SYNC_SLACK_USERS
+
+logger = logging.getLogger("tako.jobs")
+
+# Handlers get the job's session wrapped in ``Database``; ``db.run`` keeps queries off the event loop,
+# where other jobs' Slack calls are in flight.
+JobHandler = Callable[[Database, Dict[str, Any]], Awaitable[None]]
+
+
+def slack_api_call_payload(
+    workspace_id: int, method: str, body: Dict[str, Any] | None = None, raw_body: bytes | None = None
+) -> Dict[str, Any]:
+    # Only the workspace id is stored; the bot token is looked up when the job runs.
+    # ``raw_body`` is a pre-serialized JSON body that the worker sends without re-encoding.
+    if raw_body is not None:
+        return {"workspace_id": workspace_id, "method": method, "raw_body": raw_body.decode("utf-8")}
+    return {"workspace_id": workspace_id, "method": method, "body": body}
+
+
+async def handle_slack_api_call(db: Database, payload: Dict[str, Any]) -> None:
+    workspace = await db.run(get_workspace, payload["workspace_id"])
+    if not workspace:
+        raise LookupError(f"Workspace {payload['workspace_id']} not found")
+    method = payload["method"]
+    if payload.get("raw_body") is not None:
+        data = await api_call(method, token=workspace.bot_token, content=payload["raw_body"].encode("utf-8"))
+    else:
+        data = await api_call(method, token=workspace.bot_token, json=payload.get("body") or {})
+    if not data.get("ok"):
+        raise SlackAPIError(method, data.get("error", "unknown_error"))
+
+
+async def handle_reconcile_task_counters(db: Database, payload: Dict[str, Any]) -> None:
+    drift = await db.run(counters.reconcile, payload.get("workspace_id"), fix=payload.get("fix", True))
+    for entry in drift:
+        logger.warning(
+            "Task counter drift workspace=%s assignee=%s status=%s stored=%s expected=%s",
+            entry.workspace_id, entry.assignee_user_id, entry.status, entry.stored, entry.expected,
+        )
+
+
+async def handle_sync_slack_users(db: Database, payload: Dict[str, Any]) -> None:
+    seen, written = await directory.sync_users(db, payload["workspace_id"])
+    logger.info("Synced Slack users for workspace %s: %s seen, %s written", payload["workspace_id"], seen, written)
+
+
+HANDLERS: Dict[str, JobHandler] = {
+    SLACK_API_CALL: handle_slack_api_call,
+    RECONCILE_TASK_COUNTERS: handle_reconcile_task_counters,
+    SYNC_SLACK_USERS: handle_sync_slack_users,
+}
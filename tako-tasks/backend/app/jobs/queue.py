@@ -0,0 +1,112 @@
+import os
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.models.job import Job, JobStatus
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_BASE_SECONDS = float(os.getenv("JOB_BACKOFF_BASE_SECONDS", "2"))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "600"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Dict[str, Any],
+    run_at: Optional[datetime] = None,
+    max_attempts: Optional[int] = None,
+) -> Job:
+    """Add a job to the session; it becomes visible when the caller commits."""
+    job = Job(
+        kind=kind,
+        payload=payload,
+        status=JobStatus.pending,
+        run_at=run_at or datetime.utcnow(),
+        max_attempts=max_attempts or JOB_MAX_ATTEMPTS,
+    )
+    db.add(job)
+    return job
+
+
+def claim(db: Session, limit: int = 10) -> List[ClaimedJob]:
+    """Lock up to ``limit`` due jobs for this worker and mark them running.
+
+    Rows already locked by another worker are skipped, and jobs whose lease
+    expired (a worker died mid-run) are picked up again.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=JOB_LEASE_SECONDS)
+    jobs = (
+        db.query(Job)
+        .filter(
+            or_(
+                and_(Job.status == JobStatus.pending, Job.run_at <= now),
+                and_(Job.status == JobStatus.running, Job.locked_at < stale),
+            )
+        )
+        .order_by(Job.run_at, Job.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    claimed = []
+    for job in jobs:
+        job.status = JobStatus.running
+        job.locked_at = now
+        job.attempts += 1
+        claimed.append(ClaimedJob(job.id, job.kind, dict(job.payload or {}), job.attempts, job.max_attempts))
+    db.commit()
+    return claimed
+
+
+def backoff_seconds(attempts: int) -> float:
+    delay = min(JOB_BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)), JOB_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def complete(db: Session, job_id: int) -> None:
+    db.query(Job).filter(Job.id == job_id).update(
+        {"status": JobStatus.done, "locked_at": None, "last_error": None, "updated_at": datetime.utcnow()},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def fail(db: Session, job: ClaimedJob, error: str) -> JobStatus:
+    """Schedule a retry with exponential backoff, or dead-letter the job once it is out of attempts."""
+    now = datetime.utcnow()
+    if job.attempts >= job.max_attempts:
+        values = {"status": JobStatus.dead}
+    else:
+        values = {"status": JobStatus.pending, "run_at": now + timedelta(seconds=backoff_seconds(job.attempts))}
+    values.update({"locked_at": None, "last_error": error[:2000], "updated_at": now})
+    db.query(Job).filter(Job.id == job.id).update(values, synchronize_session=False)
+    db.commit()
+    return values["status"]
+
+
+def requeue_dead(db: Session, kind: Optional[str] = None) -> int:
+    """Move dead-lettered jobs back to pending with a fresh attempt budget."""
+    query = db.query(Job).filter(Job.status == JobStatus.dead)
+    if kind:
+        query = query.filter(Job.kind == kind)
+    count = query.update(
+        {"status": JobStatus.pending, "attempts": 0, "run_at": datetime.utcnow(), "updated_at": datetime.utcnow()},
+        synchronize_session=False,
+    )
+    db.commit()
+    return count
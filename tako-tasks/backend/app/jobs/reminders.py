@@ -0,0 +1,169 @@
+"""Due-date reminder scheduler.
+
+Run one instance next to the API as its own process::
+
+    python -m app.jobs.reminders
+
+Every ``--interval`` seconds it DMs each assignee a single digest of their
+open tasks coming due or overdue (see ``app.services.reminders``). Sends are
+limited per workspace to ``REMINDER_WORKSPACE_CONCURRENCY`` in flight and
+``REMINDER_WORKSPACE_RATE_PER_MINUTE``, keeping each bot token under Slack's
+``chat.postMessage`` limits; 429s are still waited out by ``api_call``.
+``--once`` runs a single pass and exits; ``--dry-run`` logs the digests
+without sending them or advancing the watermark.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.services.reminders import Digest, ReminderWindow, collect_digests, mark_reminded
+from app.services.workspaces import get_workspace
+from app.slack.client import SlackAPIError, api_call, close_client
+from app.slack.service import task_digest_message
+
+REMINDER_INTERVAL_SECONDS = float(os.getenv("REMINDER_INTERVAL_SECONDS", "300"))
+REMINDER_WORKSPACE_CONCURRENCY = int(os.getenv("REMINDER_WORKSPACE_CONCURRENCY", "2"))
+REMINDER_WORKSPACE_RATE_PER_MINUTE = float(os.getenv("REMINDER_WORKSPACE_RATE_PER_MINUTE", "50"))
+# Sends in flight across all workspaces (bounds connections to Slack).
+REMINDER_MAX_CONCURRENCY = int(os.getenv("REMINDER_MAX_CONCURRENCY", "20"))
+MARK_CHUNK_SIZE = 500
+
+logger = logging.getLogger("tako.reminders")
+
+
+class WorkspaceLimiter:
+    """At most ``concurrency`` sends in flight for one workspace, started no faster than ``per_minute``."""
+
+    def __init__(self, concurrency: int, per_minute: float):
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next = 0.0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        async with self._semaphore:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+@dataclass
+class RunStats:
+    digests: int = 0
+    sent: int = 0
+    failed: int = 0
+    tasks_marked: int = 0
+
+
+async def _send(token: str, digest: Digest, window: ReminderWindow, limiter: WorkspaceLimiter, shared) -> bool:
+    body = task_digest_message(digest.assignee_user_id, digest.tasks, digest.total, digest.overdue, window.now)
+    # Wait for the workspace's own slot first so a throttled workspace does not hold shared slots.
+    async with limiter.slot(), shared:
+        try:
+            data = await api_call("chat.postMessage", token=token, json=body)
+        except SlackAPIError as exc:
+            data = {"error": exc.error}
+    if not data.get("ok"):
+        logger.warning(
+            "Reminder to %s in workspace %s failed: %s", digest.assignee_user_id, digest.workspace_id, data.get("error")
+        )
+        return False
+    return True
+
+
+async def _remind_workspace(
+    db: Session, workspace_id: int, digests: List[Digest], window: ReminderWindow, shared, stats: RunStats
+) -> None:
+    workspace = get_workspace(db, workspace_id)
+    if workspace is None:
+        logger.warning("Skipping reminders for missing workspace %s", workspace_id)
+        stats.failed += len(digests)
+        return
+    limiter = WorkspaceLimiter(REMINDER_WORKSPACE_CONCURRENCY, REMINDER_WORKSPACE_RATE_PER_MINUTE)
+    results = await asyncio.gather(*(_send(workspace.bot_token, digest, window, limiter, shared) for digest in digests))
+    reminded = [digest.assignee_user_id for digest, ok in zip(digests, results) if ok]
+    stats.sent += len(reminded)
+    stats.failed += len(digests) - len(reminded)
+    # Only assignees whose DM went out advance their watermark; the rest are retried next run.
+    for start in range(0, len(reminded), MARK_CHUNK_SIZE):
+        stats.tasks_marked += mark_reminded(db, workspace_id, reminded[start : start + MARK_CHUNK_SIZE], window)
+
+
+async def run_once(dry_run: bool = False) -> RunStats:
+    """Find due tasks, send one digest per (workspace, assignee) and advance the watermark of those sent."""
+    window = ReminderWindow.at()
+    stats = RunStats()
+    db = SessionLocal()
+    try:
+        by_workspace: Dict[int, List[Digest]] = defaultdict(list)
+        for digest in collect_digests(db, window).values():
+            by_workspace[digest.workspace_id].append(digest)
+        # Release the scan's read transaction before the (slow) sends.
+        db.rollback()
+        stats.digests = sum(len(digests) for digests in by_workspace.values())
+        if dry_run:
+            for digests in by_workspace.values():
+                for digest in digests:
+                    logger.info(
+                        "Would remind %s in workspace %s about %s task(s), %s overdue",
+                        digest.assignee_user_id, digest.workspace_id, digest.total, digest.overdue,
+                    )
+            return stats
+        shared = asyncio.Semaphore(max(1, REMINDER_MAX_CONCURRENCY))
+        await asyncio.gather(
+            *(
+                _remind_workspace(db, workspace_id, digests, window, shared, stats)
+                for workspace_id, digests in by_workspace.items()
+            )
+        )
+        return stats
+    finally:
+        db.close()
+
+
+async def run_scheduler(interval: float = REMINDER_INTERVAL_SECONDS, once: bool = False, dry_run: bool = False) -> None:
+    try:
+        while True:
+            started = time.monotonic()
+            try:
+                stats = await run_once(dry_run)
+            except Exception:
+                if once:
+                    raise
+                logger.exception("Reminder run failed")
+            else:
+                logger.info(
+                    "Reminder run: %s digest(s), %s sent, %s failed, %s task(s) marked in %.1fs",
+                    stats.digests, stats.sent, stats.failed, stats.tasks_marked, time.monotonic() - started,
+                )
+            if once:
+                return
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+    finally:
+        await close_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DM Tako Tasks assignees about tasks coming due.")
+    parser.add_argument("--interval", type=float, default=REMINDER_INTERVAL_SECONDS, help="Seconds between runs.")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit.")
+    parser.add_argument("--dry-run", action="store_true", help="Log digests without sending or marking them.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_scheduler(args.interval, args.once, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Background job worker.
+
+Run it next to the API as its own process::
+
+    python -m app.jobs.worker
+
+``--drain`` processes everything that is currently due and exits, which is
+handy together with ``SLACK_API_BASE`` pointing at ``app.slack.stub``. Every
+``USER_DIRECTORY_CHECK_INTERVAL_SECONDS`` the worker also queues Slack user
+directory syncs for workspaces whose copy has gone stale.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import List
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.database import Database, SessionLocal
+from app.jobs import queue
+from app.jobs.handlers import HANDLERS
+from app.models.job import JobStatus
+from app.services import directory
+from app.slack.client import close_client
+
+logger = logging.getLogger("tako.jobs")
+
+
+def _record_failure(db: Session, job: queue.ClaimedJob, error: str) -> JobStatus:
+    db.rollback()
+    return queue.fail(db, job, error)
+
+
+async def _run_job(job: queue.ClaimedJob) -> None:
+    # Jobs run concurrently on one event loop, so every query goes through db.run (a threadpool thread).
+    db = Database(SessionLocal())
+    try:
+        handler = HANDLERS.get(job.kind)
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind {job.kind!r}")
+        await handler(db, job.payload)
+    except Exception as exc:
+        status = await db.run(_record_failure, job, f"{exc.__class__.__name__}: {exc}")
+        logger.warning("Job %s (%s) failed on attempt %s -> %s: %s", job.id, job.kind, job.attempts, status.value, exc)
+    else:
+        await db.run(queue.complete, job.id)
+    finally:
+        await run_in_threadpool(db.session.close)
+
+
+def _claim(batch_size: int) -> List[queue.ClaimedJob]:
+    db = SessionLocal()
+    try:
+        return queue.claim(db, limit=batch_size)
+    finally:
+        db.close()
+
+
+async def run_once(batch_size: int = 10) -> int:
+    """Claim and run one batch of due jobs; returns how many were claimed."""
+    jobs = await run_in_threadpool(_claim, batch_size)
+    if jobs:
+        await asyncio.gather(*(_run_job(job) for job in jobs))
+    return len(jobs)
+
+
+def queue_directory_syncs() -> None:
+    db = SessionLocal()
+    try:
+        directory.queue_stale_syncs(db)
+    except Exception:
+        logger.exception("Could not queue Slack user directory syncs")
+    finally:
+        db.close()
+
+
+async def run_worker(batch_size: int = 10, poll_interval: float = 1.0, drain: bool = False) -> None:
+    next_directory_check = 0.0
+    try:
+        while True:
+            if time.monotonic() >= next_directory_check:
+                await run_in_threadpool(queue_directory_syncs)
+                next_directory_check = time.monotonic() + directory.USER_DIRECTORY_CHECK_INTERVAL_SECONDS
+            processed = await run_once(batch_size)
+            if not processed:
+                if drain:
+                    return
+                await asyncio.sleep(poll_interval)
+    finally:
+        await close_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the Tako Tasks background job worker.")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--drain", action="store_true", help="Exit once no jobs are due.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker(args.batch_size, args.poll_interval, args.drain))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,52 @@
-from fastapi import FastAPI
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 
-from app.database import Base, engine
+from app import health
+from app.database import dispose_engines
 from app.routers import access, tasks, auth, slack
+from app.services.auth import token_cache
+from app.services.events import broker, start_events, stop_events
+from app.services.metrics import MetricsMiddleware, render as render_metrics
+from app.services.ratelimit import InFlightLimitMiddleware, close_backend
+from app.services.workspaces import cache_stats
+from app.slack.client import close_client
+
+# Importing this module must not touch the database: startup work lives in the lifespan hook,
+# and migrations run separately (`python -m app.schema`) unless SCHEMA_AUTO_UPGRADE is set.
+PROBES = ("/healthz", "/readyz")
+# /internal/cache-stats has no auth, so it is only mounted for local debugging.
+INTERNAL_CACHE_STATS = os.getenv("INTERNAL_CACHE_STATS", "false").lower() in {"1", "true", "yes"}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    health.state.shutting_down = False
+    if health.SCHEMA_AUTO_UPGRADE:
+        from app.schema import upgrade_schema
 
-Base.metadata.create_all(bind=engine)
+        await run_in_threadpool(upgrade_schema)
+    await start_events()
+    if health.STARTUP_WARMUP:
+        await health.warmup()
+    yield
+    # Fail readiness first so the load balancer stops routing here while requests drain.
+    health.state.shutting_down = True
+    await stop_events()
+    await close_client()
+    await close_backend()
+    await dispose_engines()
 
-app = FastAPI(title="Tako Tasks")
+
+app = FastAPI(title="Tako Tasks", lifespan=lifespan)
+
+# Sheds load before routing or any DB work; added before CORS so 503s still carry CORS headers.
+# The event stream is long-lived and holds no DB connection, so it does not count against the cap.
+app.add_middleware(InFlightLimitMiddleware, exempt=(*PROBES, "/metrics", "/tasks/events"))
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,12 +57,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so shed (503) and CORS-rejected requests are measured too.
+app.add_middleware(MetricsMiddleware, exclude=(*PROBES, "/metrics"))
+
 app.include_router(access.router)
 app.include_router(auth.router)
 app.include_router(tasks.router)
 app.include_router(slack.router)
 
 
-@app.get("/")
-def index():
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving; never touches the database."""
     return {"service": "tako-tasks", "status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: the database answers through the pool and the process is not shutting down."""
+    ready, detail = await health.readiness()
+    return JSONResponse(detail, status_code=200 if ready else 503)
+
+
+if INTERNAL_CACHE_STATS:
+
+    @app.get("/internal/cache-stats", include_in_schema=False)
+    def internal_cache_stats():
+        return {"workspaces": cache_stats(), "tokens": token_cache.stats(), "events": broker.stats()}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
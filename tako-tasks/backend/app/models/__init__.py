@@ -1,7 +1,10 @@
 from app.database import Base  # re-export for metadata
 from app.models.access_key import AccessKey
 from app.models.workspace import Workspace
-from app.models.task import Task, TaskHistory, TaskStatus
+from app.models.task import Task, TaskCounter, TaskHistory, TaskStatus, TaskTag
+from app.models.job import Job, JobStatus
+from app.models.email import EmailOutbox, EmailStatus
+from app.models.slack_user import SlackUser
 
 __all__ = [
     "Base",
@@ -10,4 +13,11 @@ __all__ = [
     "Task",
     "TaskHistory",
     "TaskStatus",
+    "TaskTag",
+    "TaskCounter",
+    "Job",
+    "JobStatus",
+    "EmailOutbox",
+    "EmailStatus",
+    "SlackUser",
 ]
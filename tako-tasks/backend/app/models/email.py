@@ -0,0 +1,32 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Index
+import enum
+
+from app.database import Base
+
+
+class EmailStatus(str, enum.Enum):
+    pending = "pending"
+    sending = "sending"
+    sent = "sent"
+    failed = "failed"
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String, nullable=False)
+    to_name = Column(String, nullable=False, default="")
+    subject = Column(String, nullable=False)
+    text_body = Column(String, nullable=False)
+    html_body = Column(String, nullable=True)
+    status = Column(Enum(EmailStatus), default=EmailStatus.pending, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,30 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Index
+from sqlalchemy.dialects.postgresql import JSON
+import enum
+
+from app.database import Base
+
+
+class JobStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    dead = "dead"
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_run_at", "status", "run_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, default=dict)
+    status = Column(Enum(JobStatus), default=JobStatus.pending, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    run_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,22 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, ForeignKey, Integer, String
+
+from app.database import Base
+
+
+class SlackUser(Base):
+    """Local copy of a workspace's Slack members, filled by ``users.list`` syncs."""
+
+    __tablename__ = "slack_users"
+
+    workspace_id = Column(Integer, ForeignKey("workspaces.id"), primary_key=True)
+    user_id = Column(String, primary_key=True)
+    name = Column(String, nullable=False, default="")
+    real_name = Column(String, nullable=False, default="")
+    display_name = Column(String, nullable=False, default="")
+    avatar_url = Column(String, nullable=False, default="")
+    is_bot = Column(Boolean, nullable=False, default=False)
+    deleted = Column(Boolean, nullable=False, default=False)
+    # Slack's own ``updated`` timestamp; members whose value did not change are not rewritten on sync.
+    slack_updated = Column(BigInteger, nullable=False, default=0)
+    synced_at = Column(DateTime, default=datetime.utcnow)
@@ -1,7 +1,8 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey
+from typing import Iterable
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Index, event, text
 from sqlalchemy.dialects.postgresql import JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 import enum
 
 from app.database import Base
@@ -15,8 +16,51 @@ class TaskStatus(str, enum.Enum):
     done = "done"
 
 
+def parse_tags(value: str | Iterable[str] | None) -> list[str]:
+    """Normalize a comma-separated string (or list) into unique, lower-cased tag names."""
+    if not value:
+        return []
+    parts = value.split(",") if isinstance(value, str) else value
+    names: list[str] = []
+    for part in parts:
+        name = part.strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+# Partial-index predicate for "open" tasks; done tasks dominate old workspaces.
+OPEN_TASK_PREDICATE = text("status != 'done'")
+# The reminder scheduler range-scans open, dated tasks across all workspaces by due date.
+OPEN_DUE_PREDICATE = text("status != 'done' AND due_date IS NOT NULL")
+
+
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # list_tasks always filters on workspace_id and pages by (created_at, id).
+        Index("ix_tasks_workspace_created", "workspace_id", "created_at", "id"),
+        Index("ix_tasks_workspace_assignee_created", "workspace_id", "assignee_user_id", "created_at", "id"),
+        Index("ix_tasks_workspace_status_created", "workspace_id", "status", "created_at", "id"),
+        Index("ix_tasks_workspace_priority_created", "workspace_id", "priority", "created_at", "id"),
+        Index("ix_tasks_workspace_due", "workspace_id", "due_date"),
+        # Incremental exports and their watermark range-scan updated_at within a workspace.
+        Index("ix_tasks_workspace_updated", "workspace_id", "updated_at", "id"),
+        Index(
+            "ix_tasks_open_workspace_due",
+            "workspace_id",
+            "due_date",
+            postgresql_where=OPEN_TASK_PREDICATE,
+            sqlite_where=OPEN_TASK_PREDICATE,
+        ),
+        Index(
+            "ix_tasks_open_due_id",
+            "due_date",
+            "id",
+            postgresql_where=OPEN_DUE_PREDICATE,
+            sqlite_where=OPEN_DUE_PREDICATE,
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -30,12 +74,56 @@ class Task(Base):
     tags = Column(String, default="")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Set by the reminder scheduler; cleared when due_date changes so the new date is reminded.
+    last_reminded_at = Column(DateTime, nullable=True)
 
     history = relationship("TaskHistory", back_populates="task", cascade="all, delete-orphan")
+    tag_links = relationship("TaskTag", back_populates="task", cascade="all, delete-orphan")
+
+    @validates("tags")
+    def _sync_tag_links(self, key, value):
+        # ``tags`` stays the comma-separated form the API exposes; ``task_tags`` is the indexed set.
+        names = parse_tags(value)
+        existing = {link.tag: link for link in self.tag_links}
+        self.tag_links = [existing.get(name) or TaskTag(tag=name) for name in names]
+        return ",".join(names)
+
+
+class TaskTag(Base):
+    __tablename__ = "task_tags"
+    __table_args__ = (Index("ix_task_tags_workspace_tag", "workspace_id", "tag", "task_id"),)
+
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    tag = Column(String, primary_key=True)
+    workspace_id = Column(Integer, ForeignKey("workspaces.id"), nullable=False)
+
+    task = relationship("Task", back_populates="tag_links")
+
+
+class TaskCounter(Base):
+    """Running task counts per (workspace, assignee, status), maintained by the task service."""
+
+    __tablename__ = "task_counters"
+
+    workspace_id = Column(Integer, ForeignKey("workspaces.id"), primary_key=True)
+    assignee_user_id = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    # Bumped by every task write that touches the row; summed per workspace as the list ETag validator.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+
+@event.listens_for(TaskTag, "before_insert")
+def _copy_task_workspace(mapper, connection, target):
+    target.workspace_id = target.task.workspace_id
 
 
 class TaskHistory(Base):
     __tablename__ = "task_history"
+    __table_args__ = (
+        Index("ix_task_history_task_id", "task_id", "id"),
+        Index("ix_task_history_created", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
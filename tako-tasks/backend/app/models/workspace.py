@@ -15,3 +15,8 @@ class Workspace(Base):
     access_key_used = Column(String, nullable=False)
     installed_at = Column(DateTime, default=datetime.utcnow)
     settings = Column(String, default="{}")  # JSON string for simplicity
+    # Embedded in dashboard JWTs; bumped on reinstall so older tokens stop working.
+    token_version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Slack user directory: last completed users.list sync and last time one was queued.
+    users_synced_at = Column(DateTime, nullable=True)
+    users_sync_requested_at = Column(DateTime, nullable=True)
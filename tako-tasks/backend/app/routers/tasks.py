@@ -1,131 +1,356 @@
 import json
+import os
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Literal
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.schemas.task import TaskCreate, TaskUpdate, TaskOut, TaskDetail
-from app.models import Task, TaskHistory, TaskStatus, Workspace
-from app.services.auth import decode_jwt
+from app.database import Database, get_database
+from app.schemas.task import (
+    TagCount,
+    TaskBulkRequest,
+    TaskBulkResponse,
+    TaskCreate,
+    TaskDetail,
+    TaskHistoryOut,
+    TaskHistoryPage,
+    TaskOut,
+    TaskPage,
+    TaskSummary,
+    TaskUpdate,
+)
+from app.models import TaskStatus
+from app.services.auth import verify_jwt
+from app.services import counters as counter_service
+from app.services import directory as directory_service
+from app.services import events as event_service
+from app.services import exports as export_service
+from app.services import http_cache
+from app.services import ratelimit
+from app.services import tasks as task_service
+from app.services import workspaces as workspace_service
+from app.services.workspaces import WorkspaceSnapshot, resolve_workspace
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
+TASKS_PAGE_DEFAULT = int(os.getenv("TASKS_PAGE_DEFAULT", "50"))
+TASKS_PAGE_MAX = int(os.getenv("TASKS_PAGE_MAX", "200"))
+# Counting stops here so include_total stays cheap on very large workspaces.
+TASKS_TOTAL_CAP = int(os.getenv("TASKS_TOTAL_CAP", "10000"))
+TASK_HISTORY_PREVIEW = int(os.getenv("TASK_HISTORY_PREVIEW", "20"))
+TASK_HISTORY_PAGE_MAX = int(os.getenv("TASK_HISTORY_PAGE_MAX", "200"))
+# Read endpoints select plain rows and render them with orjson instead of going through pydantic.
+TASKS_FAST_JSON = os.getenv("TASKS_FAST_JSON", "false").lower() in {"1", "true", "yes"}
 
-def get_current_workspace(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Workspace:
-    payload = decode_jwt(token)
+
+async def authenticate(token: str, db: Database) -> WorkspaceSnapshot:
+    # Both lookups are in-process caches, so a repeat token costs no HMAC check and no query.
+    payload = verify_jwt(token)
     workspace_id = payload.get("workspace_id")
-    workspace = db.query(Workspace).get(workspace_id)
+    workspace = await resolve_workspace(db, workspace_id) if workspace_id is not None else None
     if not workspace:
         raise HTTPException(status_code=401, detail="Workspace not found")
+    # Tokens from before token versions existed carry no "ver" and count as version 1. The version comes from
+    # the cached snapshot, so another process's reinstall takes effect within WORKSPACE_CACHE_TTL_SECONDS.
+    if payload.get("ver", 1) != workspace.token_version:
+        raise HTTPException(status_code=401, detail="Token revoked")
     return workspace
 
 
-@router.get("/tasks", response_model=list[TaskOut])
-def list_tasks(
+async def get_current_workspace(
+    token: str = Depends(oauth2_scheme), db: Database = Depends(get_database)
+) -> WorkspaceSnapshot:
+    return await authenticate(token, db)
+
+
+def workspace_limit(name: str):
+    """Route dependency charging the caller's workspace bucket for limit ``name``."""
+
+    async def dependency(workspace: WorkspaceSnapshot = Depends(get_current_workspace)) -> None:
+        await ratelimit.check(name, f"ws:{workspace.id}")
+
+    return Depends(dependency)
+
+
+READ_LIMIT = [workspace_limit("tasks_read")]
+WRITE_LIMIT = [workspace_limit("tasks_write")]
+
+
+def task_filters(
     assignee: str | None = None,
     status: TaskStatus | None = None,
     priority: str | None = None,
     due_date: datetime | None = None,
-    tag: str | None = Query(default=None, description="Filter tasks containing tag"),
+    tag: str | None = Query(default=None, description="Filter tasks carrying this exact tag"),
+    tags: list[str] | None = Query(default=None, description="Tags to match (repeat or comma-separate)"),
+    tag_mode: Literal["any", "all"] = Query(default="any", description="Match any or all of `tags`"),
     search: str | None = None,
-    db: Session = Depends(get_db),
-    workspace: Workspace = Depends(get_current_workspace),
+) -> task_service.TaskFilters:
+    return task_service.TaskFilters(assignee, status, priority, due_date, tag, search, tags, tag_mode)
+
+
+def _user_ids(rows) -> set[str]:
+    # Rows are plain dicts on the TASKS_FAST_JSON path and Task objects otherwise.
+    fields = ("assignee_user_id", "creator_user_id")
+    return {row[field] if isinstance(row, dict) else getattr(row, field) for row in rows for field in fields}
+
+
+@router.get("/tasks", response_model=TaskPage, dependencies=READ_LIMIT)
+async def list_tasks(
+    request: Request,
+    response: Response,
+    filters: task_service.TaskFilters = Depends(task_filters),
+    limit: int = Query(default=TASKS_PAGE_DEFAULT, ge=1, le=TASKS_PAGE_MAX),
+    cursor: str | None = Query(default=None, description="next_cursor from the previous page"),
+    include_total: bool = Query(default=False, description=f"Count matching tasks (capped at {TASKS_TOTAL_CAP})"),
+    include_users: bool = Query(default=False, description="Add names and avatars for the page's user ids"),
+    db: Database = Depends(get_database),
+    workspace: WorkspaceSnapshot = Depends(get_current_workspace),
 ):
-    query = db.query(Task).filter(Task.workspace_id == workspace.id)
-    if assignee:
-        query = query.filter(Task.assignee_user_id == assignee)
-    if status:
-        query = query.filter(Task.status == status)
-    if priority:
-        query = query.filter(Task.priority == priority)
-    if due_date:
-        query = query.filter(Task.due_date <= due_date)
-    if tag:
-        query = query.filter(Task.tags.ilike(f"%{tag}%"))
-    if search:
-        query = query.filter(Task.title.ilike(f"%{search}%"))
-    return query.order_by(Task.created_at.desc()).all()
-
-
-@router.get("/tasks/{task_id}", response_model=TaskDetail)
-def get_task(task_id: int, db: Session = Depends(get_db), workspace: Workspace = Depends(get_current_workspace)):
-    task = (
-        db.query(Task)
-        .filter(Task.id == task_id, Task.workspace_id == workspace.id)
-        .first()
+    validator = await db.run(task_service.list_validator, workspace.id)
+    # A directory sync bumps users_synced_at, so expanded pages revalidate when names change.
+    directory_version = workspace.users_synced_at if include_users else None
+    etag = http_cache.make_etag(
+        "tasks", workspace.id, validator, filters, limit, cursor, include_total, include_users, directory_version
+    )
+    if http_cache.is_fresh(request, etag):
+        return http_cache.not_modified(etag)
+    rows, next_cursor, total = await db.run(
+        task_service.list_page,
+        workspace.id,
+        filters,
+        limit,
+        cursor,
+        TASKS_TOTAL_CAP if include_total else None,
+        as_dicts=TASKS_FAST_JSON,
+    )
+    users = None
+    if include_users:
+        # Read from the local directory only; never a Slack call per request.
+        users = await db.run(directory_service.lookup_users, workspace.id, _user_ids(rows))
+    if TASKS_FAST_JSON:
+        return ORJSONResponse(
+            {
+                "items": rows,
+                "next_cursor": next_cursor,
+                "total": None if total is None else min(total, TASKS_TOTAL_CAP),
+                "total_is_exact": None if total is None else total <= TASKS_TOTAL_CAP,
+                "users": users,
+            },
+            headers=http_cache.validator_headers(etag),
+        )
+    http_cache.set_validators(response, etag)
+    if total is None:
+        return TaskPage(items=rows, next_cursor=next_cursor, users=users)
+    return TaskPage(
+        items=rows,
+        next_cursor=next_cursor,
+        total=min(total, TASKS_TOTAL_CAP),
+        total_is_exact=total <= TASKS_TOTAL_CAP,
+        users=users,
+    )
+
+
+@router.get("/tags", response_model=list[TagCount], dependencies=READ_LIMIT)
+async def list_tags(db: Database = Depends(get_database), workspace: WorkspaceSnapshot = Depends(get_current_workspace)):
+    counts = await db.run(task_service.tag_counts, workspace.id)
+    return [TagCount(tag=tag, count=count) for tag, count in counts]
+
+
+# Declared before /tasks/{task_id} so "summary" is not parsed as a task id.
+@router.get("/tasks/summary", response_model=TaskSummary, dependencies=READ_LIMIT)
+async def task_summary(
+    assignee: str | None = None,
+    db: Database = Depends(get_database),
+    workspace: WorkspaceSnapshot = Depends(get_current_workspace),
+):
+    return TaskSummary(**await db.run(counter_service.summary, workspace.id, assignee))
+
+
+@router.get("/tasks/events")
+async def task_events(
+    db: Database = Depends(get_database),
+    token: str | None = Depends(optional_oauth2_scheme),
+    access_token: str | None = Query(default=None, description="For EventSource clients, which cannot send headers"),
+    last_event_id: str | None = Header(default=None),
+    resume_from: str | None = Query(default=None, alias="last_event_id"),
+):
+    """Server-sent stream of task created/updated/deleted events for the caller's workspace.
+
+    Reconnect with ``Last-Event-ID`` (sent automatically by EventSource) to
+    replay what was missed; a ``reset`` event means the gap could not be
+    replayed (or the client fell behind) and the task list should be refetched.
+    """
+    token = token or access_token
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    workspace = await authenticate(token, db)
+    await ratelimit.check("tasks_read", f"ws:{workspace.id}")
+    return StreamingResponse(
+        event_service.stream(workspace.id, last_event_id or resume_from),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _export_response(name: str, body, fmt: export_service.ExportFormat, gzip: bool, watermark: datetime | None):
+    filename = f"{name}.{fmt}" + (".gz" if gzip else "")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"}
+    if watermark is not None:
+        headers["X-Export-Watermark"] = watermark.isoformat()
+    media_type = "application/gzip" if gzip else export_service.MEDIA_TYPES[fmt]
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+
+# Export routes are declared before /tasks/{task_id} so "export" and "history" are not parsed as task ids.
+@router.get("/tasks/export", dependencies=READ_LIMIT)
+async def export_tasks(
+    filters: task_service.TaskFilters = Depends(task_filters),
+    format: export_service.ExportFormat = Query(default="csv"),
+    since: datetime | None = Query(default=None, description="Only tasks updated after this (X-Export-Watermark)"),
+    gzip: bool = Query(default=False, description="Send a .gz file"),
+    db: Database = Depends(get_database),
+    workspace: WorkspaceSnapshot = Depends(get_current_workspace),
+):
+    """Stream every matching task as CSV or NDJSON, ordered by id; memory use does not grow with the workspace."""
+    until = await db.run(export_service.task_watermark, workspace.id, filters, since)
+    statement = export_service.task_export_query(workspace.id, filters, since, until)
+    body = export_service.stream(statement, export_service.task_encoder(format, gzip))
+    return _export_response("tasks", body, format, gzip, export_service.resume_point(until, since))
+
+
+@router.get("/tasks/history/export", dependencies=READ_LIMIT)
+async def export_task_history(
+    filters: task_service.TaskFilters = Depends(task_filters),
+    format: export_service.ExportFormat = Query(default="csv"),
+    since: datetime | None = Query(default=None, description="Only entries created after this (X-Export-Watermark)"),
+    gzip: bool = Query(default=False, description="Send a .gz file"),
+    db: Database = Depends(get_database),
+    workspace: WorkspaceSnapshot = Depends(get_current_workspace),
+):
+    """Stream the history of every matching task as CSV or NDJSON, oldest entry first."""
+    until = await db.run(export_service.history_watermark, workspace.id, filters, since)
+    statement = export_service.history_export_query(workspace.id, filters, since, until)
+    body = export_service.stream(statement, export_service.history_encoder(format, gzip))
+    return _export_response("task-history", body, format, gzip, export_service.resume_point(until, since))
+
+
+@router.get("/tasks/{task_id}", response_model=TaskDetail, dependencies=READ_LIMIT)
+async def get_task(
+    request: Request,
+    response: Response,
+    task_id: int,
+    history_limit: int = Query(default=TASK_HISTORY_PREVIEW, ge=0, le=TASK_HISTORY_PAGE_MAX),
+    db: Database = Depends(get_database),
+    workspace: WorkspaceSnapshot = Depends(get_current_workspace),
+):
+    validator = await db.run(task_service.task_validator, workspace.id, task_id)
+    if validator is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    updated_at, latest_history_id = validator
+    etag = http_cache.make_etag("task", workspace.id, task_id, updated_at, latest_history_id, history_limit)
+    if http_cache.is_fresh(request, etag):
+        return http_cache.not_modified(etag)
+    task, history, next_cursor = await db.run(
+        task_service.task_with_history, workspace.id, task_id, history_limit, as_dicts=TASKS_FAST_JSON
     )
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    if TASKS_FAST_JSON:
+        return ORJSONResponse(
+            {**task, "history": history, "history_next_cursor": next_cursor},
+            headers=http_cache.validator_headers(etag),
+        )
+    http_cache.set_validators(response, etag)
+    return TaskDetail(
+        **TaskOut.from_orm(task).dict(),
+        history=[TaskHistoryOut.from_orm(entry) for entry in history],
+        history_next_cursor=next_cursor,
+    )
+
+
+@router.get("/tasks/{task_id}/history", response_model=TaskHistoryPage, dependencies=READ_LIMIT)
+async def get_task_history(
+    task_id: int,
+    limit: int = Query(default=TASK_HISTORY_PREVIEW, ge=1, le=TASK_HISTORY_PAGE_MAX),
+    cursor: str | None = Query(default=None, description="next_cursor (or history_next_cursor) from the previous page"),
+    db: Database = Depends(get_database),
+    workspace: WorkspaceSnapshot = Depends(get_current_workspace),
+):
+    page = await db.run(task_service.history_page, workspace.id, task_id, limit, cursor, as_dicts=TASKS_FAST_JSON)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    entries, next_cursor = page
+    if TASKS_FAST_JSON:
+        return ORJSONResponse({"items": entries, "next_cursor": next_cursor})
+    return TaskHistoryPage(items=entries, next_cursor=next_cursor)
 
 
-@router.post("/tasks", response_model=TaskOut)
-def create_task(payload: TaskCreate, db: Session = Depends(get_db), workspace: Workspace = Depends(get_current_workspace)):
+@router.post("/tasks", response_model=TaskOut, dependencies=WRITE_LIMIT)
+async def create_task(
+    payload: TaskCreate, db: Database = Depends(get_database), workspace: WorkspaceSnapshot = Depends(get_current_workspace)
+):
     if payload.workspace_id != workspace.id:
         raise HTTPException(status_code=403, detail="Invalid workspace")
-    task = Task(**payload.dict())
-    db.add(task)
-    db.commit()
-    db.refresh(task)
-    history = TaskHistory(
-        task_id=task.id,
-        user_id=payload.creator_user_id,
-        action="created",
-        details={"title": task.title},
-    )
-    db.add(history)
-    db.commit()
-    return task
+    return await db.run(task_service.create_task, payload.dict(), payload.creator_user_id, {"title": payload.title})
 
 
-@router.put("/tasks/{task_id}", response_model=TaskOut)
-def update_task(
+@router.post("/tasks/bulk", response_model=TaskBulkResponse, dependencies=WRITE_LIMIT)
+async def bulk_tasks(
+    payload: TaskBulkRequest,
+    response: Response,
+    db: Database = Depends(get_database),
+    workspace: WorkspaceSnapshot = Depends(get_current_workspace),
+):
+    result = await db.run(task_service.apply_bulk, workspace.id, workspace.bot_user_id, payload)
+    if not result.committed:
+        response.status_code = 400
+    return result
+
+
+@router.put("/tasks/{task_id}", response_model=TaskOut, dependencies=WRITE_LIMIT)
+async def update_task(
     task_id: int,
     payload: TaskUpdate,
-    db: Session = Depends(get_db),
-    workspace: Workspace = Depends(get_current_workspace),
+    db: Database = Depends(get_database),
+    workspace: WorkspaceSnapshot = Depends(get_current_workspace),
 ):
-    task = db.query(Task).filter(Task.id == task_id, Task.workspace_id == workspace.id).first()
+    task = await db.run(
+        task_service.update_task, workspace.id, task_id, payload.dict(exclude_unset=True), workspace.bot_user_id
+    )
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    for field, value in payload.dict(exclude_unset=True).items():
-        setattr(task, field, value)
-    db.add(task)
-    db.add(
-        TaskHistory(
-            task_id=task.id,
-            user_id=workspace.bot_user_id,
-            action="updated",
-            details=payload.dict(exclude_unset=True),
-        )
-    )
-    db.commit()
-    db.refresh(task)
     return task
 
 
-@router.delete("/tasks/{task_id}")
-def delete_task(task_id: int, db: Session = Depends(get_db), workspace: Workspace = Depends(get_current_workspace)):
-    task = db.query(Task).filter(Task.id == task_id, Task.workspace_id == workspace.id).first()
-    if not task:
+@router.delete("/tasks/{task_id}", dependencies=WRITE_LIMIT)
+async def delete_task(
+    task_id: int, db: Database = Depends(get_database), workspace: WorkspaceSnapshot = Depends(get_current_workspace)
+):
+    if not await db.run(task_service.delete_task, workspace.id, task_id):
         raise HTTPException(status_code=404, detail="Task not found")
-    db.delete(task)
-    db.commit()
     return {"ok": True}
 
 
-@router.get("/workspace/settings")
-def get_workspace_settings(workspace: Workspace = Depends(get_current_workspace)):
-    return json.loads(workspace.settings or "{}")
+@router.get("/workspace/settings", dependencies=READ_LIMIT)
+async def get_workspace_settings(
+    request: Request, response: Response, workspace: WorkspaceSnapshot = Depends(get_current_workspace)
+):
+    # Settings come from the workspace cache, so the validator costs no query at all.
+    settings = dict(workspace.settings)
+    etag = http_cache.make_etag("settings", workspace.id, json.dumps(settings, sort_keys=True, default=str))
+    if http_cache.is_fresh(request, etag):
+        return http_cache.not_modified(etag)
+    http_cache.set_validators(response, etag)
+    return settings
 
 
-@router.put("/workspace/settings")
-def update_workspace_settings(
-    payload: dict, db: Session = Depends(get_db), workspace: Workspace = Depends(get_current_workspace)
+@router.put("/workspace/settings", dependencies=WRITE_LIMIT)
+async def update_workspace_settings(
+    payload: dict, db: Database = Depends(get_database), workspace: WorkspaceSnapshot = Depends(get_current_workspace)
 ):
-    workspace.settings = json.dumps(payload)
-    db.add(workspace)
-    db.commit()
+    await db.run(workspace_service.update_settings, workspace.id, payload)
     return payload
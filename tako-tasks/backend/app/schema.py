@@ -0,0 +1,75 @@
+"""Schema migrations; run ``python -m app.schema`` before starting the API.
+
+    cd backend
+    python -m app.schema            # apply pending migrations
+    python -m app.schema --check    # exit 1 if migrations are pending
+"""
+import argparse
+import sys
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+
+from app.database import engine
+from app.models import Job
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BASELINE_REVISION = "0001"
+# Arbitrary key so concurrently starting workers take turns migrating.
+MIGRATION_LOCK_ID = 7301
+
+
+def alembic_config() -> Config:
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def upgrade_schema(revision: str = "head") -> None:
+    """Apply pending migrations.
+
+    Databases created by the old ``create_all`` call have tables but no
+    ``alembic_version``; they are stamped at the baseline revision first so
+    only the newer migrations run against them.
+    """
+    config = alembic_config()
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        config.attributes["connection"] = connection
+        tables = set(inspect(connection).get_table_names())
+        if "alembic_version" not in tables and "tasks" in tables:
+            Job.__table__.create(connection, checkfirst=True)
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, revision)
+
+
+def pending_revisions() -> bool:
+    """Whether the database is behind the newest migration."""
+    config = alembic_config()
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    with engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    return current != heads
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Apply (or check for) pending schema migrations.")
+    parser.add_argument("--revision", default="head")
+    parser.add_argument("--check", action="store_true", help="Only report; exit 1 if migrations are pending.")
+    args = parser.parse_args()
+    if args.check:
+        if pending_revisions():
+            print("Database schema is behind; run `python -m app.schema`.", file=sys.stderr)
+            return 1
+        return 0
+    upgrade_schema(args.revision)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,8 @@
 from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import Any, Dict, List, Literal, Optional, Union
+from pydantic import BaseModel, Field, validator
 
-from app.models.task import TaskStatus
+from app.models.task import TaskStatus, parse_tags
 
 
 class TaskBase(BaseModel):
@@ -14,6 +14,11 @@ class TaskBase(BaseModel):
     due_date: Optional[datetime] = None
     tags: str = ""
 
+    @validator("tags", pre=True)
+    def normalize_tags(cls, value: Union[str, List[str], None]) -> str:
+        # Accepts the comma-separated form or a list; always stored comma-separated.
+        return ",".join(parse_tags(value))
+
 
 class TaskCreate(TaskBase):
     creator_user_id: str
@@ -29,6 +34,10 @@ class TaskUpdate(BaseModel):
     due_date: Optional[datetime]
     tags: Optional[str]
 
+    @validator("tags", pre=True)
+    def normalize_tags(cls, value: Union[str, List[str], None]) -> Optional[str]:
+        return None if value is None else ",".join(parse_tags(value))
+
 
 class TaskOut(TaskBase):
     id: int
@@ -41,6 +50,41 @@ class TaskOut(TaskBase):
         orm_mode = True
 
 
+class SlackUserOut(BaseModel):
+    user_id: str
+    name: str
+    real_name: str
+    display_name: str
+    avatar_url: str
+    is_bot: bool
+    deleted: bool
+
+
+class TaskPage(BaseModel):
+    items: List[TaskOut]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_is_exact: Optional[bool] = None
+    # With include_users: directory entries for the page's assignee/creator ids, keyed by user id.
+    users: Optional[Dict[str, SlackUserOut]] = None
+
+
+class TaskSummary(BaseModel):
+    pending: int = 0
+    in_progress: int = 0
+    blocked: int = 0
+    review: int = 0
+    done: int = 0
+    open: int = 0
+    overdue: int = 0
+    total: int = 0
+
+
+class TagCount(BaseModel):
+    tag: str
+    count: int
+
+
 class TaskHistoryOut(BaseModel):
     id: int
     task_id: int
@@ -53,5 +97,39 @@ class TaskHistoryOut(BaseModel):
         orm_mode = True
 
 
+class TaskHistoryPage(BaseModel):
+    items: List[TaskHistoryOut]
+    next_cursor: Optional[str] = None
+
+
 class TaskDetail(TaskOut):
+    # Most recent entries only; page further back with /tasks/{id}/history?cursor=history_next_cursor.
     history: List[TaskHistoryOut] = []
+    history_next_cursor: Optional[str] = None
+
+
+class TaskBulkOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = None
+    data: Dict[str, Any] = {}
+
+
+class TaskBulkRequest(BaseModel):
+    # "atomic" writes nothing if any item fails; "best_effort" applies the valid items.
+    mode: Literal["atomic", "best_effort"] = "atomic"
+    operations: List[TaskBulkOperation] = Field(..., min_items=1, max_items=500)
+
+
+class TaskBulkResult(BaseModel):
+    index: int
+    op: str
+    ok: bool
+    id: Optional[int] = None
+    error: Optional[str] = None
+    task: Optional[TaskOut] = None
+
+
+class TaskBulkResponse(BaseModel):
+    mode: str
+    committed: bool
+    results: List[TaskBulkResult]
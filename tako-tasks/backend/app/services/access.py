@@ -2,11 +2,11 @@ import hashlib
 import os
 import secrets
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Tuple
 from sqlalchemy.orm import Session
 
+from app.email.outbox import enqueue_access_key_email
 from app.models.access_key import AccessKey
-from app.email.sender import send_access_key_email
 
 KEY_PREFIX = "KEY-"
 KEY_SUFFIX = "-TK"
@@ -21,7 +21,8 @@ def generate_access_key() -> str:
     return raw
 
 
-def create_and_send_access_key(db: Session, name: str, email: str, company: str, team_size: str) -> AccessKey:
+def create_access_key(db: Session, name: str, email: str, company: str, team_size: str) -> Tuple[AccessKey, str]:
+    """Store a new hashed key and queue its email in the same transaction."""
     key_plain = generate_access_key()
     hashed = _hash_key(key_plain)
 
@@ -33,11 +34,9 @@ def create_and_send_access_key(db: Session, name: str, email: str, company: str,
         key_hash=hashed,
     )
     db.add(record)
+    enqueue_access_key_email(db, email, name, key_plain)
     db.commit()
-    db.refresh(record)
-
-    send_access_key_email(email=email, name=name, key=key_plain)
-    return record
+    return record, key_plain
 
 
 def verify_key(db: Session, key: str) -> Optional[AccessKey]:
@@ -48,6 +47,5 @@ def verify_key(db: Session, key: str) -> Optional[AccessKey]:
         record.used_at = datetime.utcnow()
         db.add(record)
         db.commit()
-        db.refresh(record)
         return record
     return None
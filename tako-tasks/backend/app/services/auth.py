@@ -1,10 +1,21 @@
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional
 import jwt
 from fastapi import HTTPException, status
 
+if TYPE_CHECKING:
+    from app.services.workspaces import WorkspaceSnapshot
+
 JWT_SECRET = os.getenv("JWT_SECRET", "super-secret")
 JWT_EXPIRES_MINUTES = int(os.getenv("JWT_EXPIRES_MINUTES", "60"))
+JWT_CACHE_MAX_SIZE = int(os.getenv("JWT_CACHE_MAX_SIZE", "4096"))
+JWT_CACHE_TTL_SECONDS = float(os.getenv("JWT_CACHE_TTL_SECONDS", "60"))
 
 
 def create_jwt(payload: dict) -> str:
@@ -14,8 +25,75 @@ def create_jwt(payload: dict) -> str:
     return jwt.encode(to_encode, JWT_SECRET, algorithm="HS256")
 
 
+def workspace_claims(workspace: "WorkspaceSnapshot", **extra: Any) -> Dict[str, Any]:
+    """Claims for a dashboard token; ``ver`` must match the workspace's ``token_version``.
+
+    Only claims that ``authenticate`` checks are included; everything else is
+    read from the workspace row.
+    """
+    return {"workspace_id": workspace.id, "ver": workspace.token_version, **extra}
+
+
 def decode_jwt(token: str) -> dict:
     try:
         return jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
     except jwt.PyJWTError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc))
+
+
+class TokenCache:
+    """Bounded LRU of verified token payloads, keyed by the token's SHA-256 digest.
+
+    Entries are dropped after ``JWT_CACHE_TTL_SECONDS`` or once the token's
+    ``exp`` passes, whichever is first, so an expired token always goes back
+    through ``decode_jwt`` and fails there.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, tuple[float, Mapping[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: bytes) -> Optional[Mapping[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[digest]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, digest: bytes, expires_at: float, payload: Mapping[str, Any]) -> None:
+        with self._lock:
+            self._entries[digest] = (expires_at, payload)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache(JWT_CACHE_MAX_SIZE)
+
+
+def verify_jwt(token: str) -> Mapping[str, Any]:
+    """``decode_jwt`` with the result cached for up to ``JWT_CACHE_TTL_SECONDS``."""
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return payload
+    payload = MappingProxyType(decode_jwt(token))
+    if JWT_CACHE_MAX_SIZE > 0 and "exp" in payload:
+        token_cache.put(digest, min(float(payload["exp"]), time.time() + JWT_CACHE_TTL_SECONDS), payload)
+    return payload
@@ -0,0 +1,155 @@
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import Integer, String, cast, func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.database import upsert_insert
+from app.models.task import OPEN_TASK_PREDICATE, Task, TaskCounter, TaskStatus
+
+CounterKey = Tuple[int, str, str]
+
+
+@dataclass(frozen=True)
+class Drift:
+    workspace_id: int
+    assignee_user_id: str
+    status: str
+    expected: int
+    stored: int
+
+
+def counter_key(workspace_id: int, assignee_user_id: str, status: Any) -> CounterKey:
+    status = status or TaskStatus.pending
+    return workspace_id, assignee_user_id, status.value if isinstance(status, TaskStatus) else str(status)
+
+
+def apply_deltas(db: Session, deltas: Dict[CounterKey, int]) -> None:
+    """Add ``deltas`` to the counters in the caller's transaction with one upsert.
+
+    Every row named in ``deltas`` also gets its ``version`` bumped, including
+    zero deltas, so a write that moves no count can still pass ``{key: 0}``
+    to invalidate list ETags (see ``workspace_version``). Rows are written in
+    key order so concurrent transactions lock them in the same order.
+    """
+    rows = [
+        {"workspace_id": key[0], "assignee_user_id": key[1], "status": key[2], "count": delta, "version": 1}
+        for key, delta in sorted(deltas.items())
+    ]
+    if not rows:
+        return
+    statement = upsert_insert(db)(TaskCounter)
+    statement = statement.on_conflict_do_update(
+        index_elements=[TaskCounter.workspace_id, TaskCounter.assignee_user_id, TaskCounter.status],
+        set_={"count": TaskCounter.count + statement.excluded.count, "version": TaskCounter.version + 1},
+    )
+    db.execute(statement, rows)
+
+
+def workspace_version(db: Session, workspace_id: int) -> int:
+    """Sum of the workspace's counter versions; it grows with every task write in the workspace.
+
+    Reads only the workspace's counter rows (one per assignee and status), never ``tasks``.
+    """
+    return db.execute(
+        select(func.coalesce(func.sum(TaskCounter.version), 0)).where(TaskCounter.workspace_id == workspace_id)
+    ).scalar()
+
+
+def moved(before: Optional[CounterKey], after: Optional[CounterKey]) -> Dict[CounterKey, int]:
+    """Deltas for a task moving from ``before`` to ``after`` (``None`` for created / deleted)."""
+    deltas: Counter = Counter()
+    if before != after:
+        if before is not None:
+            deltas[before] -= 1
+        if after is not None:
+            deltas[after] += 1
+    return deltas
+
+
+def summary(
+    db: Session, workspace_id: int, assignee: Optional[str] = None, now: Optional[datetime] = None
+) -> Dict[str, int]:
+    """Per-status counts from the counters table plus an index-backed overdue count."""
+    counts = db.query(TaskCounter.status, func.sum(TaskCounter.count)).filter(TaskCounter.workspace_id == workspace_id)
+    if assignee:
+        counts = counts.filter(TaskCounter.assignee_user_id == assignee)
+    by_status = {status.value: 0 for status in TaskStatus}
+    for status, count in counts.group_by(TaskCounter.status):
+        by_status[status] = by_status.get(status, 0) + int(count or 0)
+
+    # Same predicate as ix_tasks_open_workspace_due, so this is a range scan over open tasks only.
+    overdue = (
+        db.query(func.count())
+        .select_from(Task)
+        .filter(Task.workspace_id == workspace_id, OPEN_TASK_PREDICATE, Task.due_date < (now or datetime.utcnow()))
+    )
+    if assignee:
+        overdue = overdue.filter(Task.assignee_user_id == assignee)
+
+    total = sum(by_status.values())
+    return {
+        **by_status,
+        "open": total - by_status[TaskStatus.done.value],
+        "overdue": overdue.scalar() or 0,
+        "total": total,
+    }
+
+
+def find_drift(db: Session, workspace_id: Optional[int] = None) -> List[Drift]:
+    """Compare counters with a fresh ``GROUP BY`` over ``tasks``.
+
+    Both sides are read by one statement, so the comparison sees a single
+    snapshot even under READ COMMITTED.
+    """
+    status = func.coalesce(cast(Task.status, String), TaskStatus.pending.value)
+    expected = select(
+        Task.workspace_id,
+        Task.assignee_user_id,
+        status.label("status"),
+        func.count().label("expected"),
+        literal(0, Integer).label("stored"),
+    ).group_by(Task.workspace_id, Task.assignee_user_id, status)
+    stored = select(
+        TaskCounter.workspace_id,
+        TaskCounter.assignee_user_id,
+        TaskCounter.status,
+        literal(0, Integer).label("expected"),
+        TaskCounter.count.label("stored"),
+    )
+    if workspace_id is not None:
+        expected = expected.where(Task.workspace_id == workspace_id)
+        stored = stored.where(TaskCounter.workspace_id == workspace_id)
+    both = union_all(expected, stored).subquery()
+    key = (both.c.workspace_id, both.c.assignee_user_id, both.c.status)
+    rows = db.execute(
+        select(*key, func.sum(both.c.expected), func.sum(both.c.stored))
+        .group_by(*key)
+        .having(func.sum(both.c.expected) != func.sum(both.c.stored))
+        .order_by(*key)
+    ).all()
+    return [Drift(ws, assignee, status, int(exp), int(sto)) for ws, assignee, status, exp, sto in rows]
+
+
+def reconcile(db: Session, workspace_id: Optional[int] = None, fix: bool = True) -> List[Drift]:
+    """Report counter drift and, with ``fix``, correct it.
+
+    Corrections are applied as increments rather than absolute values, so
+    writes committed while this runs are not overwritten.
+    """
+    drift = find_drift(db, workspace_id)
+    if fix and drift:
+        apply_deltas(
+            db, {counter_key(d.workspace_id, d.assignee_user_id, d.status): d.expected - d.stored for d in drift}
+        )
+        # Rows that drop to zero are kept: deleting one would lower workspace_version and could repeat an old ETag.
+        db.commit()
+    return drift
+
+
+def merge(deltas: Iterable[Dict[CounterKey, int]]) -> Dict[CounterKey, int]:
+    total: Counter = Counter()
+    for delta in deltas:
+        total.update(delta)
+    return total
@@ -0,0 +1,170 @@
+"""Slack user directory: a local, per-workspace copy of ``users.list``.
+
+A sync pages through ``users.list`` and upserts only members whose Slack
+``updated`` timestamp changed, so refreshing an unchanged workspace rewrites
+nothing. Syncs run on the job worker, queued on install and by the worker
+itself once a copy is older than ``USER_DIRECTORY_TTL_SECONDS``
+(``queue_stale_syncs``). Request handlers only read the table
+(``lookup_users`` is one ``IN`` query); an id that is not in it yet, such as
+someone who just joined, shows up after the next sync.
+"""
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from app.database import Database, upsert_insert
+from app.jobs import queue
+from app.models.slack_user import SlackUser
+from app.models.workspace import Workspace
+from app.services.workspaces import get_workspace, invalidate_workspace
+from app.slack.client import SlackAPIError, api_call
+
+USER_DIRECTORY_TTL_SECONDS = float(os.getenv("USER_DIRECTORY_TTL_SECONDS", "21600"))
+# At most one sync is queued per workspace in this window, across all API processes.
+USER_DIRECTORY_MIN_SYNC_INTERVAL_SECONDS = float(os.getenv("USER_DIRECTORY_MIN_SYNC_INTERVAL_SECONDS", "300"))
+USER_DIRECTORY_PAGE_SIZE = int(os.getenv("USER_DIRECTORY_PAGE_SIZE", "200"))
+# How often the job worker looks for stale directories.
+USER_DIRECTORY_CHECK_INTERVAL_SECONDS = float(os.getenv("USER_DIRECTORY_CHECK_INTERVAL_SECONDS", "300"))
+
+SYNC_SLACK_USERS = "slack.sync_users"
+
+USER_COLUMNS = (
+    SlackUser.user_id,
+    SlackUser.name,
+    SlackUser.real_name,
+    SlackUser.display_name,
+    SlackUser.avatar_url,
+    SlackUser.is_bot,
+    SlackUser.deleted,
+)
+SYNCED_FIELDS = ("name", "real_name", "display_name", "avatar_url", "is_bot", "deleted", "slack_updated", "synced_at")
+
+logger = logging.getLogger("tako.directory")
+
+
+def member_row(workspace_id: int, member: Dict[str, Any], synced_at: datetime) -> Dict[str, Any]:
+    profile = member.get("profile") or {}
+    return {
+        "workspace_id": workspace_id,
+        "user_id": member["id"],
+        "name": member.get("name") or "",
+        "real_name": member.get("real_name") or profile.get("real_name") or "",
+        "display_name": profile.get("display_name") or "",
+        "avatar_url": profile.get("image_72") or profile.get("image_48") or "",
+        "is_bot": bool(member.get("is_bot")),
+        "deleted": bool(member.get("deleted")),
+        "slack_updated": int(member.get("updated") or 0),
+        "synced_at": synced_at,
+    }
+
+
+def upsert_members(db: Session, rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    statement = upsert_insert(db)(SlackUser)
+    statement = statement.on_conflict_do_update(
+        index_elements=[SlackUser.workspace_id, SlackUser.user_id],
+        set_={name: statement.excluded[name] for name in SYNCED_FIELDS},
+    )
+    db.execute(statement, rows)
+
+
+def _known_members(db: Session, workspace_id: int) -> Dict[str, int]:
+    rows = db.execute(
+        select(SlackUser.user_id, SlackUser.slack_updated).where(SlackUser.workspace_id == workspace_id)
+    ).all()
+    return dict(rows)
+
+
+def _store_page(db: Session, rows: List[Dict[str, Any]]) -> None:
+    upsert_members(db, rows)
+    db.commit()
+
+
+def _finish_sync(db: Session, workspace_id: int, started: datetime) -> None:
+    db.execute(update(Workspace).where(Workspace.id == workspace_id).values(users_synced_at=started))
+    db.commit()
+    invalidate_workspace(workspace_id=workspace_id)
+
+
+async def sync_users(db: Database, workspace_id: int) -> tuple[int, int]:
+    """Page through ``users.list`` and store changed members; returns ``(seen, written)``.
+
+    Each page is committed on its own, so an interrupted sync keeps its progress
+    and the next one skips what was already written. Database work goes through
+    ``db.run`` so the worker's event loop keeps serving other jobs meanwhile.
+    """
+    workspace = await db.run(get_workspace, workspace_id)
+    if workspace is None:
+        raise LookupError(f"Workspace {workspace_id} not found")
+    started = datetime.utcnow()
+    known = await db.run(_known_members, workspace_id)
+    seen = written = 0
+    cursor = ""
+    while True:
+        params = {"limit": USER_DIRECTORY_PAGE_SIZE, **({"cursor": cursor} if cursor else {})}
+        data = await api_call("users.list", token=workspace.bot_token, data=params)
+        if not data.get("ok"):
+            raise SlackAPIError("users.list", data.get("error", "unknown_error"))
+        members = data.get("members") or []
+        rows = [member_row(workspace_id, member, started) for member in members if member.get("id")]
+        changed = [row for row in rows if known.get(row["user_id"]) != row["slack_updated"]]
+        await db.run(_store_page, changed)
+        seen += len(rows)
+        written += len(changed)
+        cursor = (data.get("response_metadata") or {}).get("next_cursor") or ""
+        if not cursor:
+            break
+    await db.run(_finish_sync, workspace_id, started)
+    return seen, written
+
+
+def request_sync(db: Session, workspace_id: int, now: Optional[datetime] = None) -> bool:
+    """Queue a directory sync unless one was queued in the last ``USER_DIRECTORY_MIN_SYNC_INTERVAL_SECONDS``.
+
+    The check-and-set is a single conditional ``UPDATE`` on the workspace row, so
+    concurrent requests and processes queue one job between them.
+    """
+    now = now or datetime.utcnow()
+    recent = now - timedelta(seconds=USER_DIRECTORY_MIN_SYNC_INTERVAL_SECONDS)
+    claimed = db.execute(
+        update(Workspace)
+        .where(
+            Workspace.id == workspace_id,
+            or_(Workspace.users_sync_requested_at.is_(None), Workspace.users_sync_requested_at < recent),
+        )
+        .values(users_sync_requested_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if claimed:
+        queue.enqueue(db, SYNC_SLACK_USERS, {"workspace_id": workspace_id}, max_attempts=3)
+    db.commit()
+    return bool(claimed)
+
+
+def queue_stale_syncs(db: Session, now: Optional[datetime] = None) -> int:
+    """Queue a sync for every workspace whose directory is older than ``USER_DIRECTORY_TTL_SECONDS``."""
+    now = now or datetime.utcnow()
+    stale = now - timedelta(seconds=USER_DIRECTORY_TTL_SECONDS)
+    workspace_ids = db.execute(
+        select(Workspace.id).where(or_(Workspace.users_synced_at.is_(None), Workspace.users_synced_at < stale))
+    ).scalars().all()
+    queued = sum(request_sync(db, workspace_id, now) for workspace_id in workspace_ids)
+    if queued:
+        logger.info("Queued Slack user directory sync for %s workspace(s)", queued)
+    return queued
+
+
+def lookup_users(db: Session, workspace_id: int, user_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Directory entries for ``user_ids`` in one query; ids not in the directory are left out."""
+    ids = sorted({user_id for user_id in user_ids if user_id})
+    if not ids:
+        return {}
+    rows = db.execute(
+        select(*USER_COLUMNS).where(SlackUser.workspace_id == workspace_id, SlackUser.user_id.in_(ids))
+    )
+    return {row.user_id: dict(row._mapping) for row in rows}
@@ -0,0 +1,304 @@
+"""Per-workspace task change feed.
+
+Task mutations record events on the SQLAlchemy session; they are published
+only after the transaction commits (and dropped on rollback). Each API
+process keeps a broker on its event loop that fans events out to bounded
+subscriber queues and remembers the last ``EVENTS_REPLAY_SIZE`` events per
+workspace so a reconnecting client can resume from ``Last-Event-ID``.
+
+On Postgres the same events are sent with ``pg_notify`` inside the
+committing transaction, and every process LISTENs on the channel, so a
+change made by one worker reaches streams held by the others.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.database import ASYNC_DATABASE_URL, DATABASE_URL
+
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_REPLAY_SIZE = int(os.getenv("EVENTS_REPLAY_SIZE", "500"))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+# "auto" turns LISTEN/NOTIFY fan-out on whenever the database is Postgres.
+EVENTS_PG_NOTIFY = os.getenv("EVENTS_PG_NOTIFY", "auto").strip().lower()
+EVENTS_CHANNEL = "tako_task_events"
+
+NODE_ID = uuid.uuid4().hex[:12]
+_SESSION_KEY = "task_events"
+_sequence = itertools.count(1)
+
+logger = logging.getLogger("tako.events")
+
+
+def pg_notify_enabled() -> bool:
+    if EVENTS_PG_NOTIFY == "auto":
+        return DATABASE_URL.startswith("postgresql")
+    return EVENTS_PG_NOTIFY in {"1", "true", "yes"}
+
+
+@dataclass(frozen=True)
+class TaskEvent:
+    id: str
+    workspace_id: int
+    type: str
+    task_id: int
+    data: Dict[str, Any]
+    node: str = NODE_ID
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "id": self.id,
+                "workspace_id": self.workspace_id,
+                "type": self.type,
+                "task_id": self.task_id,
+                "data": self.data,
+                "node": self.node,
+            },
+            default=str,
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, raw: str) -> "TaskEvent":
+        value = json.loads(raw)
+        return cls(value["id"], value["workspace_id"], value["type"], value["task_id"], value["data"], value["node"])
+
+    def sse(self) -> str:
+        body = {"type": self.type, "task_id": self.task_id, **self.data}
+        payload = json.dumps(body, default=str, separators=(",", ":"))
+        return f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n"
+
+
+def _summary(task: Any) -> Dict[str, Any]:
+    # Enough for the dashboard to update a row in place; NOTIFY payloads must stay under 8000 bytes.
+    status = getattr(task, "status", None)
+    return {
+        "title": (task.title or "")[:200],
+        "status": getattr(status, "value", status),
+        "assignee_user_id": task.assignee_user_id,
+        "updated_at": task.updated_at.isoformat() if task.updated_at else None,
+    }
+
+
+def record_task_event(db: Session, workspace_id: int, kind: str, task_id: int, task: Any = None) -> None:
+    """Queue a ``task.<kind>`` event on the session; it is published once the session commits."""
+    event_id = f"{int(time.time() * 1000)}-{NODE_ID}-{next(_sequence)}"
+    data = _summary(task) if task is not None else {}
+    db.info.setdefault(_SESSION_KEY, []).append(TaskEvent(event_id, workspace_id, f"task.{kind}", task_id, data))
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_other_processes(session: Session) -> None:
+    pending = session.info.get(_SESSION_KEY)
+    if pending and pg_notify_enabled():
+        # Delivered by Postgres only if this transaction commits.
+        for item in pending:
+            session.execute(select(func.pg_notify(EVENTS_CHANNEL, item.to_json())))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session: Session) -> None:
+    pending = session.info.pop(_SESSION_KEY, None)
+    if pending:
+        broker.publish_threadsafe(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+
+
+class Subscription:
+    """A client's bounded event queue; ``overflowed`` is set when it fell too far behind."""
+
+    def __init__(self, workspace_id: int, size: int):
+        self.workspace_id = workspace_id
+        self.queue: "asyncio.Queue[TaskEvent]" = asyncio.Queue(maxsize=size)
+        self.overflowed = asyncio.Event()
+
+
+@dataclass
+class Broker:
+    """In-process pub/sub; every method except ``publish_threadsafe`` runs on the event loop."""
+
+    queue_size: int
+    replay_size: int
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    subscribers: Dict[int, Set[Subscription]] = field(default_factory=dict)
+    recent: Dict[int, Deque[TaskEvent]] = field(default_factory=dict)
+    dropped: int = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+
+    def publish_threadsafe(self, events: List[TaskEvent]) -> None:
+        # Commits happen on threadpool threads (sync mode) or on the loop itself (async mode).
+        if self.loop is None or self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.publish, events)
+
+    def publish(self, events: List[TaskEvent]) -> None:
+        for item in events:
+            recent = self.recent.get(item.workspace_id)
+            if recent is None:
+                recent = self.recent[item.workspace_id] = deque(maxlen=self.replay_size)
+            recent.append(item)
+            for subscription in list(self.subscribers.get(item.workspace_id, ())):
+                try:
+                    subscription.queue.put_nowait(item)
+                except asyncio.QueueFull:
+                    # A slow client must not make the broker buffer without bound: cut it loose,
+                    # it resumes from its last event id (or refetches) on reconnect.
+                    self.dropped += 1
+                    subscription.overflowed.set()
+                    self.unsubscribe(subscription)
+
+    def subscribe(
+        self, workspace_id: int, last_event_id: Optional[str] = None
+    ) -> tuple[Subscription, List[TaskEvent], bool]:
+        """Register a subscriber; returns it, the events to replay and whether ``last_event_id`` was found."""
+        subscription = Subscription(workspace_id, self.queue_size)
+        self.subscribers.setdefault(workspace_id, set()).add(subscription)
+        recent = list(self.recent.get(workspace_id, ()))
+        if not last_event_id:
+            return subscription, [], True
+        for index, item in enumerate(recent):
+            if item.id == last_event_id:
+                return subscription, recent[index + 1 :], True
+        return subscription, [], False
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self.subscribers.get(subscription.workspace_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self.subscribers[subscription.workspace_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "node": NODE_ID,
+            "subscribers": sum(len(subs) for subs in self.subscribers.values()),
+            "workspaces": len(self.recent),
+            "dropped": self.dropped,
+            "pg_notify": pg_notify_enabled(),
+        }
+
+
+broker = Broker(EVENTS_QUEUE_SIZE, EVENTS_REPLAY_SIZE)
+
+
+async def stream(workspace_id: int, last_event_id: Optional[str] = None):
+    """Yield SSE frames for ``workspace_id`` until the client disconnects or falls behind."""
+    subscription, backlog, resumed = broker.subscribe(workspace_id, last_event_id)
+    try:
+        yield f"retry: 3000\n: connected {NODE_ID}\n\n"
+        if not resumed:
+            # The requested event is older than the replay buffer; the client has to refetch.
+            yield "event: reset\ndata: {}\n\n"
+        for item in backlog:
+            yield item.sse()
+        overflow = asyncio.ensure_future(subscription.overflowed.wait())
+        getter = asyncio.ensure_future(subscription.queue.get())
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    {getter, overflow}, timeout=EVENTS_HEARTBEAT_SECONDS, return_when=asyncio.FIRST_COMPLETED
+                )
+                if getter in done:
+                    yield getter.result().sse()
+                    getter = asyncio.ensure_future(subscription.queue.get())
+                elif overflow in done:
+                    yield "event: reset\ndata: {\"reason\":\"overflow\"}\n\n"
+                    return
+                else:
+                    yield ": ping\n\n"
+        finally:
+            getter.cancel()
+            overflow.cancel()
+    finally:
+        broker.unsubscribe(subscription)
+
+
+class PostgresListener:
+    """Keeps a LISTEN connection open and republishes other processes' events locally."""
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            item = TaskEvent.from_json(payload)
+        except (ValueError, KeyError):
+            logger.warning("Ignoring malformed task event payload")
+            return
+        if item.node != NODE_ID:
+            broker.publish([item])
+
+    async def _run(self) -> None:
+        import asyncpg
+
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+            except (OSError, asyncpg.PostgresError) as exc:
+                logger.warning("Task event listener could not connect: %s", exc)
+                await asyncio.sleep(5)
+                continue
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+            try:
+                await connection.add_listener(EVENTS_CHANNEL, self._on_notify)
+                await closed.wait()
+                logger.warning("Task event listener connection closed; reconnecting")
+            finally:
+                if not connection.is_closed():
+                    await connection.close()
+
+
+_listener: Optional[PostgresListener] = None
+
+
+def _listen_dsn() -> str:
+    # asyncpg wants a plain postgresql:// DSN, without SQLAlchemy's "+asyncpg" driver suffix.
+    _, sep, rest = ASYNC_DATABASE_URL.partition("://")
+    return f"postgresql{sep}{rest}"
+
+
+async def start_events() -> None:
+    global _listener
+    broker.bind(asyncio.get_running_loop())
+    if pg_notify_enabled() and _listener is None:
+        _listener = PostgresListener(_listen_dsn())
+        _listener.start()
+
+
+async def stop_events() -> None:
+    global _listener
+    if _listener is not None:
+        await _listener.stop()
+        _listener = None
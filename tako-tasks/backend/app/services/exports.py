@@ -0,0 +1,208 @@
+"""Streaming CSV / NDJSON exports of tasks and task history.
+
+Rows are read over a dedicated connection with ``yield_per`` (a server-side
+cursor on Postgres) and encoded one partition at a time, so memory stays flat
+however large the workspace is. The request's own session is only used for
+the watermark query; the stream outlives it.
+
+Each export is bounded above by the newest ``updated_at`` (history:
+``created_at``) seen before streaming starts. Those stamps are taken when a
+transaction flushes, not when it commits, so a slow transaction can commit a
+row stamped below that bound after the export ran. ``X-Export-Watermark``
+therefore trails the bound by ``EXPORT_WATERMARK_LAG_SECONDS``: passing it
+back as ``since`` re-exports the last few seconds, and consumers should
+dedupe by ``id`` (keeping the newest ``updated_at``). Only a transaction
+that takes longer than the lag to commit can still be missed.
+"""
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, AsyncIterator, Iterator, Literal, Optional, Sequence
+
+import orjson
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session
+
+from app.database import DB_MODE, engine, get_async_engine
+from app.models.task import Task, TaskHistory, parse_tags
+from app.services.tasks import (
+    HISTORY_OUT_COLUMNS,
+    HISTORY_OUT_FIELDS,
+    TASK_OUT_COLUMNS,
+    TASK_OUT_FIELDS,
+    TaskFilters,
+    task_criteria,
+)
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# How far X-Export-Watermark trails the newest exported row; the overlap that catches late commits.
+EXPORT_WATERMARK_LAG_SECONDS = float(os.getenv("EXPORT_WATERMARK_LAG_SECONDS", "30"))
+
+ExportFormat = Literal["csv", "ndjson"]
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+def _upper_bound(latest: Optional[datetime], since: Optional[datetime]) -> Optional[datetime]:
+    # Never behind ``since``, so chaining exports through the header cannot move backwards.
+    if latest is None or (since is not None and since > latest):
+        return since
+    return latest
+
+
+def resume_point(until: Optional[datetime], since: Optional[datetime]) -> Optional[datetime]:
+    """The ``since`` to pass to the next incremental export: ``until`` minus the lag, never behind ``since``."""
+    if until is None:
+        return since
+    return _upper_bound(until - timedelta(seconds=EXPORT_WATERMARK_LAG_SECONDS), since)
+
+
+def task_watermark(
+    db: Session, workspace_id: int, filters: TaskFilters, since: Optional[datetime] = None
+) -> Optional[datetime]:
+    latest = db.execute(select(func.max(Task.updated_at)).where(*task_criteria(workspace_id, filters))).scalar()
+    return _upper_bound(latest, since)
+
+
+def history_watermark(
+    db: Session, workspace_id: int, filters: TaskFilters, since: Optional[datetime] = None
+) -> Optional[datetime]:
+    latest = db.execute(
+        select(func.max(TaskHistory.created_at))
+        .join(Task, Task.id == TaskHistory.task_id)
+        .where(*task_criteria(workspace_id, filters))
+    ).scalar()
+    return _upper_bound(latest, since)
+
+
+def task_export_query(
+    workspace_id: int, filters: TaskFilters, since: Optional[datetime], until: Optional[datetime]
+) -> Select:
+    query = select(*TASK_OUT_COLUMNS).where(*task_criteria(workspace_id, filters))
+    if since is not None:
+        query = query.where(Task.updated_at > since)
+    if until is not None:
+        query = query.where(Task.updated_at <= until)
+    return query.order_by(Task.id)
+
+
+def history_export_query(
+    workspace_id: int, filters: TaskFilters, since: Optional[datetime], until: Optional[datetime]
+) -> Select:
+    query = (
+        select(*HISTORY_OUT_COLUMNS)
+        .join(Task, Task.id == TaskHistory.task_id)
+        .where(*task_criteria(workspace_id, filters))
+    )
+    if since is not None:
+        query = query.where(TaskHistory.created_at > since)
+    if until is not None:
+        query = query.where(TaskHistory.created_at <= until)
+    return query.order_by(TaskHistory.id)
+
+
+def _task_row(row: Sequence[Any]) -> dict:
+    data = dict(zip(TASK_OUT_FIELDS, row))
+    # Same normalization as the list endpoints, so exported rows match the API.
+    data["tags"] = ",".join(parse_tags(data["tags"]))
+    return data
+
+
+def _history_row(row: Sequence[Any]) -> dict:
+    return dict(zip(HISTORY_OUT_FIELDS, row))
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    return value
+
+
+class Encoder:
+    """Turns row partitions into CSV or NDJSON bytes, optionally as one gzip stream."""
+
+    def __init__(self, fmt: ExportFormat, fields: Sequence[str], to_dict, gzip: bool = False):
+        self.fmt = fmt
+        self.fields = fields
+        self.to_dict = to_dict
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+
+    def _out(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) if self._compressor else data
+
+    def start(self) -> bytes:
+        if self.fmt != "csv":
+            return b""
+        return self._out(self._csv([self.fields]))
+
+    def encode(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        if self.fmt == "csv":
+            return self._out(self._csv([_csv_value(value) for value in self.to_dict(row).values()] for row in rows))
+        return self._out(b"".join(orjson.dumps(self.to_dict(row)) + b"\n" for row in rows))
+
+    def finish(self) -> bytes:
+        return self._compressor.flush() if self._compressor else b""
+
+    @staticmethod
+    def _csv(rows) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+
+def task_encoder(fmt: ExportFormat, gzip: bool) -> Encoder:
+    return Encoder(fmt, TASK_OUT_FIELDS, _task_row, gzip)
+
+
+def history_encoder(fmt: ExportFormat, gzip: bool) -> Encoder:
+    return Encoder(fmt, HISTORY_OUT_FIELDS, _history_row, gzip)
+
+
+def _stream_sync(statement: Select, encoder: Encoder) -> Iterator[bytes]:
+    yield encoder.start()
+    with engine.connect() as connection:
+        result = connection.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for rows in result.partitions():
+            yield encoder.encode(rows)
+    yield encoder.finish()
+
+
+async def _stream_async(statement: Select, encoder: Encoder) -> AsyncIterator[bytes]:
+    yield encoder.start()
+    async with get_async_engine().connect() as connection:
+        result = await connection.stream(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield encoder.encode(rows)
+    yield encoder.finish()
+
+
+def _nonempty(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    # gzip output is buffered, so many partitions produce no bytes yet; skip the empty chunks.
+    return (chunk for chunk in chunks if chunk)
+
+
+async def _nonempty_async(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        if chunk:
+            yield chunk
+
+
+def stream(statement: Select, encoder: Encoder):
+    """Body iterator for a ``StreamingResponse``.
+
+    In sync mode Starlette pulls each chunk on a threadpool thread; in async
+    mode the rows come from ``AsyncConnection.stream``. Either way the
+    connection is held only while the body is being sent.
+    """
+    if DB_MODE == "async":
+        return _nonempty_async(_stream_async(statement, encoder))
+    return _nonempty(_stream_sync(statement, encoder))
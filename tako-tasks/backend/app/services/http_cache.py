@@ -0,0 +1,46 @@
+"""ETag validators for conditional GETs.
+
+Routes compute a validator from a cheap query (or from in-memory state),
+answer ``304 Not Modified`` when the client already has it, and only
+otherwise load and serialize the body. There is no ``Last-Modified``: a
+second-resolution timestamp misses edits within the same second and writes
+that only append history.
+"""
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+
+# Responses depend on the bearer token, and the client should revalidate on every use.
+CACHE_HEADERS = {"Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag over the ``repr`` of ``parts``."""
+    digest = hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/"x" matches "x".
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+
+def is_fresh(request: Request, etag: str) -> bool:
+    """Whether the client's cached copy is current, from ``If-None-Match``."""
+    if_none_match = request.headers.get("if-none-match")
+    return if_none_match is not None and _etag_matches(if_none_match, etag)
+
+
+def validator_headers(etag: str) -> dict:
+    return {"ETag": etag, **CACHE_HEADERS}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag))
+
+
+def set_validators(response: Response, etag: str) -> None:
+    response.headers.update(validator_headers(etag))
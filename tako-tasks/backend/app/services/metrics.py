@@ -0,0 +1,223 @@
+"""Prometheus metrics: request latency, per-request SQL, pool state and outbound calls.
+
+``MetricsMiddleware`` opens a per-request tally in a context variable; the
+SQLAlchemy hooks installed by ``instrument_engine`` add each statement's
+count and time to it (the context follows the request onto threadpool
+threads and into ``AsyncSession.run_sync``). Pool gauges are read from the
+engines only when ``/metrics`` is scraped.
+
+Under several worker processes set ``PROMETHEUS_MULTIPROC_DIR`` so the
+counters and histograms are aggregated across them; pool gauges are then
+reported by the scraped process only.
+"""
+import contextvars
+import logging
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import REGISTRY, GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in {"1", "true", "yes"}
+# Requests issuing at least this many statements are logged and counted as likely N+1 patterns.
+METRICS_N_PLUS_ONE_THRESHOLD = int(os.getenv("METRICS_N_PLUS_ONE_THRESHOLD", "20"))
+
+logger = logging.getLogger("tako.metrics")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_STATEMENTS = Histogram(
+    "http_request_db_statements",
+    "SQL statements executed per HTTP request.",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 20, 50, 100),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent executing SQL per HTTP request.",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+N_PLUS_ONE = Counter(
+    "http_request_n_plus_one_total",
+    "Requests that executed at least METRICS_N_PLUS_ONE_THRESHOLD statements.",
+    ["route"],
+)
+DB_STATEMENTS = Counter("db_statements_total", "SQL statements executed, in or out of requests.", ["engine"])
+POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the pool.",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT.", ["engine"])
+EXTERNAL_DURATION = Histogram(
+    "external_call_duration_seconds",
+    "Outbound call latency (Slack Web API attempts, SMTP sends).",
+    ["service", "method", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+@dataclass
+class RequestTally:
+    statements: int = 0
+    db_seconds: float = 0.0
+
+
+_tally: contextvars.ContextVar[Optional[RequestTally]] = contextvars.ContextVar("request_tally", default=None)
+
+
+class _TimedPoolMixin:
+    """Times checkouts, including the wait for a free connection once the pool is exhausted."""
+
+    metrics_label = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.labels(self.metrics_label).inc()
+            raise
+        finally:
+            POOL_WAIT.labels(self.metrics_label).observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    metrics_label = "sync"
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+_engines: List[Tuple[str, Engine]] = []
+
+
+def instrument_engine(engine: Engine, label: str) -> None:
+    """Count and time ``engine``'s statements and report its pool on ``/metrics``."""
+    if not METRICS_ENABLED:
+        return
+    statements = DB_STATEMENTS.labels(label)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["metrics_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        statements.inc()
+        tally = _tally.get()
+        if tally is not None:
+            tally.statements += 1
+            tally.db_seconds += time.perf_counter() - conn.info.pop("metrics_started", time.perf_counter())
+
+    # A re-created engine (e.g. after dispose_engines) replaces the one reported under its label.
+    _engines[:] = [(name, known) for name, known in _engines if name != label]
+    _engines.append((label, engine))
+
+
+class PoolCollector:
+    def collect(self):
+        checked_out = GaugeMetricFamily("db_pool_checked_out", "Connections currently checked out.", labels=["engine"])
+        overflow = GaugeMetricFamily("db_pool_overflow", "Connections open beyond pool_size.", labels=["engine"])
+        size = GaugeMetricFamily("db_pool_size", "Configured pool_size.", labels=["engine"])
+        for label, engine in _engines:
+            pool = engine.pool
+            if not isinstance(pool, QueuePool):
+                continue
+            checked_out.add_metric([label], pool.checkedout())
+            overflow.add_metric([label], max(pool.overflow(), 0))
+            size.add_metric([label], pool.size())
+        yield checked_out
+        yield overflow
+        yield size
+
+
+REGISTRY.register(PoolCollector())
+
+
+def observe_external(service: str, method: str, outcome: str, seconds: float) -> None:
+    if METRICS_ENABLED:
+        EXTERNAL_DURATION.labels(service, method, outcome).observe(seconds)
+
+
+@contextmanager
+def external_call(service: str, method: str) -> Iterator[None]:
+    """Time an outbound call; an exception is recorded with outcome ``error`` and re-raised."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        observe_external(service, method, outcome, time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """Records latency per route template plus SQL statements and time per request."""
+
+    def __init__(self, app: ASGIApp, exclude: tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.exclude = exclude
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not METRICS_ENABLED or scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+        tally = RequestTally()
+        token = _tally.set(tally)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _tally.reset(token)
+            # The router stores the matched route on the scope; unmatched paths share one label.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_DURATION.labels(scope["method"], route, str(status)).observe(elapsed)
+            REQUEST_STATEMENTS.labels(route).observe(tally.statements)
+            REQUEST_DB_SECONDS.labels(route).observe(tally.db_seconds)
+            if tally.statements >= METRICS_N_PLUS_ONE_THRESHOLD:
+                N_PLUS_ONE.labels(route).inc()
+                logger.warning(
+                    "%s %s ran %d SQL statements (%.1f ms in the database); possible N+1 query",
+                    scope["method"],
+                    route,
+                    tally.statements,
+                    tally.db_seconds * 1000,
+                )
+
+
+def render() -> tuple[bytes, str]:
+    """The ``/metrics`` body and content type."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        registry.register(PoolCollector())
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
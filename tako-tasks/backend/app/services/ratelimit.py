@@ -0,0 +1,217 @@
+"""Per-tenant token-bucket rate limits and a global in-flight cap.
+
+Limits are configured per route group as ``<count>/<second|minute|hour>``
+(e.g. ``RATE_LIMIT_TASKS_READ=600/minute``); a bucket holds ``count`` tokens
+and refills continuously, so short bursts up to ``count`` are allowed.
+Buckets live in process memory by default; set ``RATE_LIMIT_BACKEND=redis``
+to share them across workers.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict
+
+from fastapi import HTTPException, Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.database import DB_MAX_OVERFLOW, DB_POOL_SIZE
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in {"1", "true", "yes"}
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").strip().lower()
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Use the first X-Forwarded-For hop as the client IP (only behind a proxy that sets it).
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in {"1", "true", "yes"}
+# Requests served concurrently by this process; 0 disables. Defaults to twice the DB pool.
+API_MAX_IN_FLIGHT = int(os.getenv("API_MAX_IN_FLIGHT", str(2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW))))
+
+logger = logging.getLogger("tako.ratelimit")
+
+_PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0}
+
+
+@dataclass(frozen=True)
+class Limit:
+    capacity: float
+    refill_per_second: float
+
+    @classmethod
+    def parse(cls, value: str) -> "Limit":
+        count, _, period = value.strip().partition("/")
+        seconds = _PERIODS[period.strip().lower().rstrip("s") or "second"]
+        return cls(capacity=float(count), refill_per_second=float(count) / seconds)
+
+
+DEFAULT_LIMITS = {
+    "tasks_read": "600/minute",
+    "tasks_write": "120/minute",
+    "slack": "300/minute",
+    "verify_key": "10/minute",
+    "request_access": "5/minute",
+}
+
+LIMITS: Dict[str, Limit] = {
+    name: Limit.parse(os.getenv(f"RATE_LIMIT_{name.upper()}", default)) for name, default in DEFAULT_LIMITS.items()
+}
+
+
+class MemoryBackend:
+    """Buckets in a bounded LRU dict; an evicted bucket simply starts full again."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, limit: Limit, cost: float = 1.0) -> float:
+        """Consume ``cost`` tokens; returns 0 if allowed, else seconds until enough have refilled."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (limit.capacity, now))
+            tokens = min(limit.capacity, tokens + (now - updated) * limit.refill_per_second)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / limit.refill_per_second
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= cost then
+  tokens = tokens - cost
+else
+  wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """Buckets shared by every worker, updated atomically by a Lua script on the Redis clock.
+
+    If Redis is unreachable requests are let through (and logged) rather than failing the API.
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:  # pragma: no cover - depends on deployment
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package") from exc
+        self._client = redis.from_url(url)
+        self._take = self._client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, limit: Limit, cost: float = 1.0) -> float:
+        try:
+            wait = await self._take(keys=[f"ratelimit:{key}"], args=[limit.capacity, limit.refill_per_second, cost])
+        except Exception as exc:
+            logger.warning("Rate limit backend unavailable, allowing request: %s", exc)
+            return 0.0
+        return float(wait)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = RedisBackend(RATE_LIMIT_REDIS_URL) if RATE_LIMIT_BACKEND == "redis" else MemoryBackend(
+            RATE_LIMIT_MAX_KEYS
+        )
+    return _backend
+
+
+async def close_backend() -> None:
+    global _backend
+    if isinstance(_backend, RedisBackend):
+        await _backend.close()
+    _backend = None
+
+
+async def check(name: str, key: str) -> None:
+    """Spend one token from ``key``'s bucket for limit ``name``, or raise 429 with ``Retry-After``."""
+    if not RATE_LIMIT_ENABLED:
+        return
+    wait = await get_backend().take(f"{name}:{key}", LIMITS[name])
+    if wait > 0:
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def limit_by_ip(name: str):
+    """Dependency limiting a route per client IP."""
+
+    async def dependency(request: Request) -> None:
+        await check(name, f"ip:{client_ip(request)}")
+
+    return dependency
+
+
+class InFlightLimitMiddleware:
+    """Reject requests with 503 once ``max_in_flight`` are already being served.
+
+    Shedding at the edge keeps requests from queueing on the DB pool until
+    ``DB_POOL_TIMEOUT``; paths in ``exempt`` are always served.
+    """
+
+    def __init__(self, app: ASGIApp, max_in_flight: int = API_MAX_IN_FLIGHT, exempt: tuple[str, ...] = ()):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.exempt = exempt
+        self.in_flight = 0
+        self.shed = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.max_in_flight <= 0 or scope["path"] in self.exempt:
+            await self.app(scope, receive, send)
+            return
+        if self.in_flight >= self.max_in_flight:
+            self.shed += 1
+            response = JSONResponse({"detail": "Server busy"}, status_code=503, headers={"Retry-After": "1"})
+            await response(scope, receive, send)
+            return
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
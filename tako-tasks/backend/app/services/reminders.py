@@ -0,0 +1,128 @@
+"""Due-date reminders: find open tasks coming due, group them per assignee, record who was reminded.
+
+Eligible tasks are read with a keyset range scan over ``ix_tasks_open_due_id``
+(open, dated tasks ordered by ``(due_date, id)``), one batch at a time. A
+digest keeps only its ``REMINDER_DIGEST_MAX_TASKS`` most urgent tasks plus a
+count, so memory grows with the number of assignees, not tasks.
+
+``tasks.last_reminded_at`` is the watermark: a task is reminded again only
+after ``REMINDER_REPEAT_HOURS``, and a rerun right after a successful run
+finds nothing to send.
+"""
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import or_, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.models.task import OPEN_DUE_PREDICATE, Task
+
+# Remind about tasks due within this many hours, and about overdue ones.
+REMINDER_LEAD_HOURS = float(os.getenv("REMINDER_LEAD_HOURS", "24"))
+# A task that is still open is reminded again after this many hours.
+REMINDER_REPEAT_HOURS = float(os.getenv("REMINDER_REPEAT_HOURS", "24"))
+# Tasks overdue for longer than this are left alone; also bounds the range scan.
+REMINDER_MAX_OVERDUE_DAYS = float(os.getenv("REMINDER_MAX_OVERDUE_DAYS", "14"))
+REMINDER_SCAN_BATCH_SIZE = int(os.getenv("REMINDER_SCAN_BATCH_SIZE", "1000"))
+REMINDER_DIGEST_MAX_TASKS = int(os.getenv("REMINDER_DIGEST_MAX_TASKS", "10"))
+
+DUE_TASK_COLUMNS = (Task.id, Task.workspace_id, Task.assignee_user_id, Task.title, Task.priority, Task.due_date)
+
+DigestKey = Tuple[int, str]
+
+
+@dataclass(frozen=True)
+class ReminderWindow:
+    now: datetime
+    earliest_due: datetime
+    latest_due: datetime
+    reminded_before: datetime
+
+    @classmethod
+    def at(cls, now: Optional[datetime] = None) -> "ReminderWindow":
+        now = now or datetime.utcnow()
+        return cls(
+            now=now,
+            earliest_due=now - timedelta(days=REMINDER_MAX_OVERDUE_DAYS),
+            latest_due=now + timedelta(hours=REMINDER_LEAD_HOURS),
+            reminded_before=now - timedelta(hours=REMINDER_REPEAT_HOURS),
+        )
+
+
+@dataclass
+class Digest:
+    workspace_id: int
+    assignee_user_id: str
+    tasks: List[Dict[str, Any]] = field(default_factory=list)
+    total: int = 0
+    overdue: int = 0
+
+
+def _due(window: ReminderWindow) -> tuple:
+    # The literal predicate (not ``Task.status != ...`` with a bound value) lets both
+    # Postgres and SQLite match the partial index.
+    return (
+        OPEN_DUE_PREDICATE,
+        Task.due_date >= window.earliest_due,
+        Task.due_date <= window.latest_due,
+        or_(Task.last_reminded_at.is_(None), Task.last_reminded_at < window.reminded_before),
+    )
+
+
+def scan_due_tasks(
+    db: Session, window: ReminderWindow, batch_size: int = REMINDER_SCAN_BATCH_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """Yield eligible tasks most urgent first, ``batch_size`` rows per query."""
+    after = None
+    while True:
+        query = select(*DUE_TASK_COLUMNS).where(*_due(window)).order_by(Task.due_date, Task.id).limit(batch_size)
+        if after is not None:
+            query = query.where(tuple_(Task.due_date, Task.id) > after)
+        rows = db.execute(query).all()
+        for row in rows:
+            yield dict(row._mapping)
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1].due_date, rows[-1].id)
+
+
+def collect_digests(
+    db: Session,
+    window: ReminderWindow,
+    max_tasks: int = REMINDER_DIGEST_MAX_TASKS,
+    batch_size: int = REMINDER_SCAN_BATCH_SIZE,
+) -> Dict[DigestKey, Digest]:
+    digests: Dict[DigestKey, Digest] = {}
+    for task in scan_due_tasks(db, window, batch_size):
+        key = (task["workspace_id"], task["assignee_user_id"])
+        digest = digests.get(key)
+        if digest is None:
+            digest = digests[key] = Digest(*key)
+        digest.total += 1
+        digest.overdue += task["due_date"] < window.now
+        if len(digest.tasks) < max_tasks:
+            digest.tasks.append(task)
+    return digests
+
+
+def mark_reminded(db: Session, workspace_id: int, assignee_user_ids: Sequence[str], window: ReminderWindow) -> int:
+    """Advance the watermark for every eligible task of these assignees, including those past the digest cap.
+
+    Tasks changed after the scan started are skipped and come up again next run.
+    ``updated_at`` is written back unchanged so a reminder does not look like an edit.
+    """
+    result = db.execute(
+        update(Task)
+        .where(
+            Task.workspace_id == workspace_id,
+            Task.assignee_user_id.in_(assignee_user_ids),
+            Task.updated_at <= window.now,
+            *_due(window),
+        )
+        .values(last_reminded_at=window.now, updated_at=Task.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
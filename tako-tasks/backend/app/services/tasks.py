@@ -0,0 +1,462 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional, Sequence
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+from sqlalchemy import and_, delete, func, insert, select, tuple_, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Query, Session, selectinload
+
+from app.models.task import Task, TaskHistory, TaskStatus, TaskTag, parse_tags
+from app.schemas.task import (
+    TaskBulkRequest,
+    TaskBulkResponse,
+    TaskBulkResult,
+    TaskCreate,
+    TaskHistoryOut,
+    TaskOut,
+    TaskUpdate,
+)
+from app.services import counters
+from app.services.events import record_task_event
+from app.services.pagination import decode_cursor, decode_id_cursor, encode_cursor, encode_id_cursor
+
+# Column projections in response-schema field order, for the ``as_dicts`` read paths.
+TASK_OUT_FIELDS = tuple(TaskOut.__fields__)
+TASK_OUT_COLUMNS = tuple(getattr(Task, name) for name in TASK_OUT_FIELDS)
+HISTORY_OUT_FIELDS = tuple(TaskHistoryOut.__fields__)
+HISTORY_OUT_COLUMNS = tuple(getattr(TaskHistory, name) for name in HISTORY_OUT_FIELDS)
+
+
+@dataclass(frozen=True)
+class TaskFilters:
+    assignee: Optional[str] = None
+    status: Optional[TaskStatus] = None
+    priority: Optional[str] = None
+    due_date: Optional[datetime] = None
+    tag: Optional[str] = None
+    search: Optional[str] = None
+    tags: Optional[Sequence[str]] = None
+    tag_mode: Literal["any", "all"] = "any"
+
+    def tag_names(self) -> list[str]:
+        names = parse_tags([self.tag] if self.tag else [])
+        names += [name for name in parse_tags(",".join(self.tags or [])) if name not in names]
+        return names
+
+
+def task_row_dict(row: Sequence[Any]) -> Dict[str, Any]:
+    """Turn a ``TASK_OUT_COLUMNS`` row into the dict ``TaskOut`` would serialize to."""
+    data = dict(zip(TASK_OUT_FIELDS, row))
+    # Mirrors TaskOut's tag validator so the output matches the pydantic path.
+    data["tags"] = ",".join(parse_tags(data["tags"]))
+    return data
+
+
+def history_row_dict(row: Sequence[Any]) -> Dict[str, Any]:
+    return dict(zip(HISTORY_OUT_FIELDS, row))
+
+
+def task_criteria(workspace_id: int, filters: TaskFilters = TaskFilters()) -> list:
+    """WHERE clauses for a workspace's tasks matching ``filters``; shared by listing and export."""
+    criteria = [Task.workspace_id == workspace_id]
+    if filters.assignee:
+        criteria.append(Task.assignee_user_id == filters.assignee)
+    if filters.status:
+        criteria.append(Task.status == filters.status)
+    if filters.priority:
+        criteria.append(Task.priority == filters.priority)
+    if filters.due_date:
+        criteria.append(Task.due_date <= filters.due_date)
+    names = filters.tag_names()
+    if names:
+        criteria.append(Task.id.in_(tagged_task_ids(workspace_id, names, filters.tag_mode)))
+    if filters.search:
+        criteria.append(Task.title.ilike(f"%{filters.search}%"))
+    return criteria
+
+
+def filtered_tasks(db: Session, workspace_id: int, filters: TaskFilters = TaskFilters()) -> Query:
+    """Build the ``list_tasks`` query for a workspace and the given filters (unordered)."""
+    return db.query(Task).filter(*task_criteria(workspace_id, filters))
+
+
+def list_page(
+    db: Session,
+    workspace_id: int,
+    filters: TaskFilters,
+    limit: int,
+    cursor: Optional[str] = None,
+    total_cap: Optional[int] = None,
+    as_dicts: bool = False,
+) -> tuple[List[Any], Optional[str], Optional[int]]:
+    """Return one keyset page of tasks, the next cursor and (when ``total_cap`` is set) a capped count.
+
+    ``as_dicts`` selects only the ``TaskOut`` columns and returns plain dicts
+    instead of ORM objects, skipping identity-map bookkeeping.
+    """
+    query = filtered_tasks(db, workspace_id, filters)
+    total = None
+    if total_cap is not None:
+        capped = query.with_entities(Task.id).limit(total_cap + 1).subquery()
+        total = db.query(func.count()).select_from(capped).scalar()
+
+    if cursor:
+        query = after_cursor(query, cursor)
+    if as_dicts:
+        query = query.with_entities(*TASK_OUT_COLUMNS)
+    rows = query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    if as_dicts:
+        rows = [task_row_dict(row) for row in rows]
+    return rows, next_cursor, total
+
+
+def list_validator(db: Session, workspace_id: int) -> int:
+    """The workspace's task change version; every create, update and delete raises it.
+
+    Read from the small ``task_counters`` table, so validating a list never
+    touches ``tasks`` however many rows match the filters.
+    """
+    return counters.workspace_version(db, workspace_id)
+
+
+def task_validator(db: Session, workspace_id: int, task_id: int) -> Optional[tuple[datetime, Optional[int]]]:
+    """``updated_at`` and newest history id of one task (``None`` if it is not in the workspace)."""
+    latest_history = select(func.max(TaskHistory.id)).where(TaskHistory.task_id == Task.id).scalar_subquery()
+    row = db.execute(
+        select(Task.updated_at, latest_history).where(Task.id == task_id, Task.workspace_id == workspace_id)
+    ).first()
+    return None if row is None else (row[0], row[1])
+
+
+def tagged_task_ids(workspace_id: int, names: Sequence[str], mode: Literal["any", "all"] = "any"):
+    """Subquery of task ids carrying any (or all) of the exact tag ``names``."""
+    ids = select(TaskTag.task_id).where(TaskTag.workspace_id == workspace_id)
+    if len(names) == 1:
+        return ids.where(TaskTag.tag == names[0])
+    ids = ids.where(TaskTag.tag.in_(names))
+    if mode == "all":
+        ids = ids.group_by(TaskTag.task_id).having(func.count() == len(names))
+    return ids
+
+
+def tag_counts(db: Session, workspace_id: int) -> list[tuple[str, int]]:
+    return (
+        db.query(TaskTag.tag, func.count())
+        .filter(TaskTag.workspace_id == workspace_id)
+        .group_by(TaskTag.tag)
+        .order_by(func.count().desc(), TaskTag.tag)
+        .all()
+    )
+
+
+def after_cursor(query: Query, cursor: str) -> Query:
+    """Restrict a ``(created_at, id)``-descending query to rows after ``cursor``."""
+    created_at, task_id = decode_cursor(cursor)
+    return query.filter(tuple_(Task.created_at, Task.id) < tuple_(created_at, task_id))
+
+
+def task_with_history(
+    db: Session, workspace_id: int, task_id: int, limit: int, as_dicts: bool = False
+) -> tuple[Optional[Any], List[Any], Optional[str]]:
+    """Load a task and its ``limit`` most recent history entries in one query.
+
+    With ``as_dicts`` the task and entries come back as plain dicts (see ``list_page``).
+    """
+    recent = (
+        select(TaskHistory.id)
+        .where(TaskHistory.task_id == task_id)
+        .order_by(TaskHistory.id.desc())
+        .limit(limit + 1)
+    )
+    if as_dicts:
+        entities = TASK_OUT_COLUMNS + tuple(column.label(f"history_{column.key}") for column in HISTORY_OUT_COLUMNS)
+    else:
+        entities = (Task, TaskHistory)
+    rows = (
+        db.query(*entities)
+        .outerjoin(TaskHistory, and_(TaskHistory.task_id == Task.id, TaskHistory.id.in_(recent)))
+        .filter(Task.id == task_id, Task.workspace_id == workspace_id)
+        .order_by(TaskHistory.id.desc())
+        .all()
+    )
+    if not rows:
+        return None, [], None
+    if as_dicts:
+        split = len(TASK_OUT_COLUMNS)
+        task = task_row_dict(rows[0][:split])
+        history = [history_row_dict(row[split:]) for row in rows if row[split] is not None]
+    else:
+        task = rows[0][0]
+        history = [entry for _, entry in rows if entry is not None]
+    next_cursor = None
+    if len(history) > limit:
+        history = history[:limit]
+        last = history[-1]
+        next_cursor = encode_id_cursor(last["id"] if as_dicts else last.id)
+    return task, history, next_cursor
+
+
+def history_page(
+    db: Session, workspace_id: int, task_id: int, limit: int, cursor: Optional[str] = None, as_dicts: bool = False
+) -> Optional[tuple[List[Any], Optional[str]]]:
+    """Page through a task's history, newest first. ``None`` if the task is not in the workspace."""
+    query = (
+        db.query(TaskHistory)
+        .join(Task, Task.id == TaskHistory.task_id)
+        .filter(TaskHistory.task_id == task_id, Task.workspace_id == workspace_id)
+    )
+    if cursor:
+        query = query.filter(TaskHistory.id < decode_id_cursor(cursor))
+    if as_dicts:
+        query = query.with_entities(*HISTORY_OUT_COLUMNS)
+    entries = query.order_by(TaskHistory.id.desc()).limit(limit + 1).all()
+    if not entries:
+        exists = db.query(Task.id).filter(Task.id == task_id, Task.workspace_id == workspace_id).first()
+        return ([], None) if exists else None
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        next_cursor = encode_id_cursor(entries[-1].id)
+    if as_dicts:
+        entries = [history_row_dict(row) for row in entries]
+    return entries, next_cursor
+
+
+def _record_history(db: Session, task_id: int, user_id: str, action: str, details: Dict[str, Any]) -> None:
+    db.execute(
+        insert(TaskHistory),
+        [{"task_id": task_id, "user_id": user_id, "action": action, "details": jsonable_encoder(details)}],
+    )
+
+
+def create_task(
+    db: Session,
+    fields: Dict[str, Any],
+    actor_user_id: str,
+    details: Dict[str, Any],
+    commit: bool = True,
+) -> Task:
+    """Insert a task and its "created" history row in one transaction.
+
+    The flush fetches the new id (``RETURNING`` on Postgres); pass
+    ``commit=False`` to add more work to the transaction before committing.
+    """
+    task = Task(**fields)
+    db.add(task)
+    db.flush()
+    _record_history(db, task.id, actor_user_id, "created", details)
+    counters.apply_deltas(db, {counters.counter_key(task.workspace_id, task.assignee_user_id, task.status): 1})
+    record_task_event(db, task.workspace_id, "created", task.id, task)
+    if commit:
+        db.commit()
+    return task
+
+
+def update_task(
+    db: Session,
+    workspace_id: int,
+    task_id: int,
+    fields: Dict[str, Any],
+    actor_user_id: str,
+    action: str = "updated",
+    details: Optional[Dict[str, Any]] = None,
+    commit: bool = True,
+) -> Optional[Task]:
+    """Apply ``fields`` with a single ``UPDATE ... RETURNING`` and record history.
+
+    Returns ``None`` (and writes nothing) when the task is not in the workspace.
+    """
+    values = dict(fields)
+    names = None
+    if "tags" in values:
+        # Core UPDATE bypasses Task's tag validator, so keep task_tags in sync here.
+        names = parse_tags(values["tags"])
+        values["tags"] = ",".join(names)
+    if "due_date" in values:
+        # A new due date gets its own reminder.
+        values["last_reminded_at"] = None
+    owned = (Task.id == task_id, Task.workspace_id == workspace_id)
+    before = None
+    if "status" in values or "assignee_user_id" in values:
+        # The counters need the old (assignee, status); lock the row so it cannot change underneath.
+        previous = db.execute(select(Task.assignee_user_id, Task.status).where(*owned).with_for_update()).first()
+        if previous is None:
+            db.rollback()
+            return None
+        before = counters.counter_key(workspace_id, *previous)
+    if values:
+        # Wrapped in a SELECT so populate_existing refreshes a task already in the session; a bare
+        # ORM UPDATE ... RETURNING hands back the stale instance.
+        statement = select(Task).from_statement(update(Task).where(*owned).values(**values).returning(Task))
+    else:
+        statement = select(Task).where(*owned)
+    task = db.execute(statement, execution_options={"populate_existing": True}).scalar_one_or_none()
+    if task is None:
+        db.rollback()
+        return None
+    if names is not None:
+        db.execute(delete(TaskTag).where(TaskTag.task_id == task.id))
+        if names:
+            db.execute(insert(TaskTag), [{"task_id": task.id, "tag": name, "workspace_id": workspace_id} for name in names])
+    _record_history(db, task.id, actor_user_id, action, fields if details is None else details)
+    after = counters.counter_key(workspace_id, task.assignee_user_id, task.status)
+    # A zero delta still bumps the counter row's version, which list ETags are built from.
+    counters.apply_deltas(db, (counters.moved(before, after) if before is not None else None) or {after: 0})
+    record_task_event(db, workspace_id, "updated", task.id, task)
+    if commit:
+        db.commit()
+    return task
+
+
+def delete_task(db: Session, workspace_id: int, task_id: int) -> bool:
+    """Delete a task with its history and tags using set-based deletes; one commit."""
+    owned = select(Task.id).where(Task.id == task_id, Task.workspace_id == workspace_id).scalar_subquery()
+    db.execute(delete(TaskHistory).where(TaskHistory.task_id == owned))
+    db.execute(delete(TaskTag).where(TaskTag.task_id == owned))
+    deleted = db.execute(
+        delete(Task)
+        .where(Task.id == task_id, Task.workspace_id == workspace_id)
+        .returning(Task.assignee_user_id, Task.status),
+        execution_options={"synchronize_session": False},
+    ).first()
+    if deleted is None:
+        db.rollback()
+        return False
+    counters.apply_deltas(db, counters.moved(counters.counter_key(workspace_id, *deleted), None))
+    record_task_event(db, workspace_id, "deleted", task_id)
+    db.commit()
+    return True
+
+
+def _error_message(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in exc.errors())
+    return str(exc)
+
+
+def apply_bulk(db: Session, workspace_id: int, actor_user_id: str, request: TaskBulkRequest) -> TaskBulkResponse:
+    """Apply a batch of create/update/delete operations in a single transaction.
+
+    Ownership of every referenced task is checked with one query, inserts and
+    updates are flushed together, and the batch is committed once.
+    """
+    operations = request.operations
+    results = [TaskBulkResult(index=index, op=op.op, ok=True, id=op.id) for index, op in enumerate(operations)]
+
+    def fail(index: int, error: str) -> None:
+        results[index].ok = False
+        results[index].error = error
+
+    target_ids = {op.id for op in operations if op.op != "create" and op.id is not None}
+    owned: Dict[int, Task] = {}
+    if target_ids:
+        # Row locks keep concurrent batches from computing counter deltas off the same old values; locking in
+        # id order avoids deadlocks between them. Tag links are loaded up front for the tags validator.
+        owned = {
+            task.id: task
+            for task in db.query(Task)
+            .filter(Task.workspace_id == workspace_id, Task.id.in_(target_ids))
+            .options(selectinload(Task.tag_links))
+            .order_by(Task.id)
+            .with_for_update()
+        }
+
+    creates: List[tuple[int, TaskCreate]] = []
+    updates: List[tuple[int, Task, dict]] = []
+    delete_ids: List[int] = []
+    for index, op in enumerate(operations):
+        try:
+            if op.op == "create":
+                data = TaskCreate(**{"workspace_id": workspace_id, **op.data})
+                if data.workspace_id != workspace_id:
+                    raise ValueError("Invalid workspace")
+                creates.append((index, data))
+                continue
+            if op.id is None:
+                raise ValueError("id is required")
+            task = owned.get(op.id)
+            if task is None or op.id in delete_ids:
+                raise ValueError("Task not found")
+            if op.op == "update":
+                updates.append((index, task, TaskUpdate(**op.data).dict(exclude_unset=True)))
+            else:
+                delete_ids.append(op.id)
+        except (ValidationError, ValueError) as exc:
+            fail(index, _error_message(exc))
+
+    if request.mode == "atomic" and any(not result.ok for result in results):
+        for result in results:
+            if result.ok:
+                fail(result.index, "Not applied: another operation in this atomic batch failed")
+        return TaskBulkResponse(mode=request.mode, committed=False, results=results)
+
+    try:
+        created = [(index, Task(**data.dict())) for index, data in creates]
+        db.add_all(task for _, task in created)
+        key = counters.counter_key
+        deltas = [
+            counters.moved(key(workspace_id, owned[task_id].assignee_user_id, owned[task_id].status), None)
+            for task_id in delete_ids
+        ]
+        for _, task, fields in updates:
+            if task.id in delete_ids:
+                continue
+            before = key(workspace_id, task.assignee_user_id, task.status)
+            for field, value in fields.items():
+                setattr(task, field, value)
+            if "due_date" in fields:
+                task.last_reminded_at = None
+            after = key(workspace_id, task.assignee_user_id, task.status)
+            deltas.append(counters.moved(before, after) or {after: 0})
+        if delete_ids:
+            # Core deletes instead of ORM cascades so history/tag rows are not loaded one task at a time.
+            db.execute(delete(TaskHistory).where(TaskHistory.task_id.in_(delete_ids)))
+            db.execute(delete(TaskTag).where(TaskTag.task_id.in_(delete_ids)))
+            db.execute(delete(Task).where(Task.id.in_(delete_ids)).execution_options(synchronize_session=False))
+            for task_id in delete_ids:
+                db.expunge(owned[task_id])
+        db.flush()
+
+        history = [
+            {"task_id": task.id, "user_id": task.creator_user_id, "action": "created", "details": {"title": task.title}}
+            for _, task in created
+        ]
+        history += [
+            {"task_id": task.id, "user_id": actor_user_id, "action": "updated", "details": jsonable_encoder(fields)}
+            for _, task, fields in updates
+            if task.id not in delete_ids
+        ]
+        if history:
+            # History ids are never read back, so this is one executemany instead of INSERT ... RETURNING per row.
+            db.execute(insert(TaskHistory), history)
+        deltas += [counters.moved(None, key(workspace_id, task.assignee_user_id, task.status)) for _, task in created]
+        counters.apply_deltas(db, counters.merge(deltas))
+
+        for task_id in delete_ids:
+            record_task_event(db, workspace_id, "deleted", task_id)
+        for _, task in created:
+            record_task_event(db, workspace_id, "created", task.id, task)
+        for _, task, _ in updates:
+            if task.id not in delete_ids:
+                record_task_event(db, workspace_id, "updated", task.id, task)
+
+        for index, task in created:
+            results[index].id = task.id
+            results[index].task = TaskOut.from_orm(task)
+        for index, task, _ in updates:
+            if task.id not in delete_ids:
+                results[index].task = TaskOut.from_orm(task)
+        db.commit()
+    except SQLAlchemyError as exc:
+        db.rollback()
+        for result in results:
+            if result.ok:
+                fail(result.index, f"Database error: {exc.__class__.__name__}")
+            result.task = None
+        return TaskBulkResponse(mode=request.mode, committed=False, results=results)
+    return TaskBulkResponse(mode=request.mode, committed=True, results=results)
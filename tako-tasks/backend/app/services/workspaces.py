@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional
+from sqlalchemy.orm import Session
+
+from app.models.workspace import Workspace
+
+if TYPE_CHECKING:
+    from app.database import Database
+
+WORKSPACE_CACHE_TTL_SECONDS = float(os.getenv("WORKSPACE_CACHE_TTL_SECONDS", "60"))
+WORKSPACE_CACHE_MAX_SIZE = int(os.getenv("WORKSPACE_CACHE_MAX_SIZE", "1024"))
+
+
+@dataclass(frozen=True)
+class WorkspaceSnapshot:
+    id: int
+    slack_team_id: str
+    slack_team_name: str
+    bot_token: str
+    bot_user_id: str
+    settings: Mapping[str, Any]
+    token_version: int = 1
+    users_synced_at: Optional[datetime] = None
+
+    @classmethod
+    def from_model(cls, workspace: Workspace) -> "WorkspaceSnapshot":
+        return cls(
+            id=workspace.id,
+            slack_team_id=workspace.slack_team_id,
+            slack_team_name=workspace.slack_team_name,
+            bot_token=workspace.bot_token,
+            bot_user_id=workspace.bot_user_id,
+            settings=MappingProxyType(json.loads(workspace.settings or "{}")),
+            token_version=workspace.token_version or 1,
+            users_synced_at=workspace.users_synced_at,
+        )
+
+
+class WorkspaceCache:
+    """TTL + LRU cache of workspace snapshots, addressable by id or Slack team id."""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, tuple[float, WorkspaceSnapshot]]" = OrderedDict()
+        self._team_index: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get(self, workspace_id: Optional[int]) -> Optional[WorkspaceSnapshot]:
+        entry = self._entries.get(workspace_id) if workspace_id is not None else None
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._drop(workspace_id)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(workspace_id)
+        self.hits += 1
+        return entry[1]
+
+    def get_by_id(self, workspace_id: int) -> Optional[WorkspaceSnapshot]:
+        with self._lock:
+            return self._get(workspace_id)
+
+    def get_by_team(self, team_id: str) -> Optional[WorkspaceSnapshot]:
+        with self._lock:
+            return self._get(self._team_index.get(team_id))
+
+    def put(self, snapshot: WorkspaceSnapshot) -> None:
+        with self._lock:
+            self._drop(snapshot.id)
+            self._entries[snapshot.id] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._team_index[snapshot.slack_team_id] = snapshot.id
+            while len(self._entries) > self.max_size:
+                oldest_id = next(iter(self._entries))
+                self._drop(oldest_id)
+                self.evictions += 1
+
+    def invalidate(self, workspace_id: Optional[int] = None, team_id: Optional[str] = None) -> None:
+        with self._lock:
+            if team_id is not None and workspace_id is None:
+                workspace_id = self._team_index.get(team_id)
+            if workspace_id is not None:
+                self._drop(workspace_id)
+            if team_id is not None:
+                self._team_index.pop(team_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._team_index.clear()
+
+    def _drop(self, workspace_id: int) -> None:
+        entry = self._entries.pop(workspace_id, None)
+        if entry is not None and self._team_index.get(entry[1].slack_team_id) == workspace_id:
+            del self._team_index[entry[1].slack_team_id]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+workspace_cache = WorkspaceCache(WORKSPACE_CACHE_MAX_SIZE, WORKSPACE_CACHE_TTL_SECONDS)
+
+
+def _cache_snapshot(workspace: Optional[Workspace]) -> Optional[WorkspaceSnapshot]:
+    if workspace is None:
+        return None
+    snapshot = WorkspaceSnapshot.from_model(workspace)
+    workspace_cache.put(snapshot)
+    return snapshot
+
+
+def load_workspace(db: Session, workspace_id: int) -> Optional[WorkspaceSnapshot]:
+    return _cache_snapshot(db.get(Workspace, workspace_id))
+
+
+def load_workspace_by_team(db: Session, team_id: str) -> Optional[WorkspaceSnapshot]:
+    return _cache_snapshot(db.query(Workspace).filter_by(slack_team_id=team_id).first())
+
+
+def get_workspace(db: Session, workspace_id: int) -> Optional[WorkspaceSnapshot]:
+    return workspace_cache.get_by_id(workspace_id) or load_workspace(db, workspace_id)
+
+
+def get_workspace_by_team(db: Session, team_id: str) -> Optional[WorkspaceSnapshot]:
+    return workspace_cache.get_by_team(team_id) or load_workspace_by_team(db, team_id)
+
+
+async def resolve_workspace(db: "Database", workspace_id: int) -> Optional[WorkspaceSnapshot]:
+    """Async lookup that only leaves the event loop on a cache miss."""
+    return workspace_cache.get_by_id(workspace_id) or await db.run(load_workspace, workspace_id)
+
+
+async def resolve_workspace_by_team(db: "Database", team_id: str) -> Optional[WorkspaceSnapshot]:
+    return workspace_cache.get_by_team(team_id) or await db.run(load_workspace_by_team, team_id)
+
+
+def save_installation(
+    db: Session, team_id: str, team_name: str, bot_token: str, bot_user_id: str, access_key: Optional[str]
+) -> Workspace:
+    """Create or refresh the workspace row for a Slack OAuth install.
+
+    A reinstall bumps ``token_version``, revoking dashboard tokens issued before it.
+    Only this process's cache is invalidated: other API processes keep accepting
+    old tokens until their cached snapshot expires (``WORKSPACE_CACHE_TTL_SECONDS``).
+    """
+    workspace = db.query(Workspace).filter_by(slack_team_id=team_id).first()
+    if workspace:
+        workspace.token_version = Workspace.token_version + 1
+        workspace.bot_token = bot_token
+        workspace.bot_user_id = bot_user_id
+        workspace.slack_team_name = team_name or workspace.slack_team_name
+        workspace.access_key_used = access_key or workspace.access_key_used
+    else:
+        workspace = Workspace(
+            slack_team_id=team_id,
+            slack_team_name=team_name or "",
+            bot_token=bot_token,
+            bot_user_id=bot_user_id,
+            access_key_used=access_key or "",
+        )
+    db.add(workspace)
+    db.commit()
+    invalidate_workspace(workspace_id=workspace.id, team_id=team_id)
+    return workspace
+
+
+def update_settings(db: Session, workspace_id: int, settings: Dict[str, Any]) -> None:
+    db.query(Workspace).filter(Workspace.id == workspace_id).update(
+        {"settings": json.dumps(settings)}, synchronize_session=False
+    )
+    db.commit()
+    invalidate_workspace(workspace_id=workspace_id)
+
+
+def invalidate_workspace(workspace_id: Optional[int] = None, team_id: Optional[str] = None) -> None:
+    workspace_cache.invalidate(workspace_id=workspace_id, team_id=team_id)
+
+
+def cache_stats() -> Dict[str, Any]:
+    return workspace_cache.stats()
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.services.metrics import observe_external
+
+SLACK_API_BASE = os.getenv("SLACK_API_BASE", "https://slack.com/api").rstrip("/")
+SLACK_HTTP_TIMEOUT = float(os.getenv("SLACK_HTTP_TIMEOUT", "10"))
+SLACK_CONNECT_TIMEOUT = float(os.getenv("SLACK_CONNECT_TIMEOUT", "3"))
+SLACK_MAX_CONNECTIONS = int(os.getenv("SLACK_MAX_CONNECTIONS", "100"))
+SLACK_MAX_KEEPALIVE = int(os.getenv("SLACK_MAX_KEEPALIVE", "20"))
+SLACK_MAX_RETRIES = int(os.getenv("SLACK_MAX_RETRIES", "3"))
+SLACK_MAX_RETRY_AFTER = float(os.getenv("SLACK_MAX_RETRY_AFTER", "30"))
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+class SlackAPIError(Exception):
+    def __init__(self, method: str, error: str, status_code: int | None = None):
+        super().__init__(f"Slack {method} failed: {error}")
+        self.method = method
+        self.error = error
+        self.status_code = status_code
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the process-wide Slack HTTP client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=SLACK_API_BASE,
+            timeout=httpx.Timeout(SLACK_HTTP_TIMEOUT, connect=SLACK_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=SLACK_MAX_CONNECTIONS,
+                max_keepalive_connections=SLACK_MAX_KEEPALIVE,
+            ),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _retry_after(resp: httpx.Response) -> float:
+    try:
+        delay = float(resp.headers.get("Retry-After", "1"))
+    except ValueError:
+        delay = 1.0
+    return min(max(delay, 0.0), SLACK_MAX_RETRY_AFTER)
+
+
+async def api_call(
+    method: str,
+    token: str | None = None,
+    json: Dict[str, Any] | None = None,
+    data: Dict[str, Any] | None = None,
+    content: bytes | None = None,
+    max_retries: int = SLACK_MAX_RETRIES,
+) -> Dict[str, Any]:
+    """Call a Slack Web API method, waiting out ``Retry-After`` on 429 responses.
+
+    ``token`` is sent as the bearer for this call only, so one pooled client
+    serves every installed workspace. ``content`` is an already serialized
+    JSON body (see ``app.slack.templates``) and is sent as-is. Calls made while
+    a request waits (e.g. ``views.open``, whose trigger_id expires after 3s)
+    pass ``max_retries=0`` so a 429 fails fast instead of sleeping.
+    """
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    if content is not None:
+        headers["Content-Type"] = "application/json; charset=utf-8"
+    client = get_client()
+    for attempt in range(max_retries + 1):
+        started = time.perf_counter()
+        try:
+            resp = await client.post(f"/{method}", headers=headers, json=json, data=data, content=content)
+        except httpx.HTTPError as exc:
+            observe_external("slack", method, "error", time.perf_counter() - started)
+            raise SlackAPIError(method, str(exc) or exc.__class__.__name__) from exc
+        outcome = "ratelimited" if resp.status_code == 429 else "ok" if resp.is_success else "error"
+        observe_external("slack", method, outcome, time.perf_counter() - started)
+        if resp.status_code == 429 and attempt < max_retries:
+            await asyncio.sleep(_retry_after(resp))
+            continue
+        if resp.status_code == 429:
+            raise SlackAPIError(method, "ratelimited", resp.status_code)
+        try:
+            return resp.json()
+        except ValueError as exc:
+            raise SlackAPIError(method, f"invalid response ({resp.status_code})", resp.status_code) from exc
+    raise SlackAPIError(method, "ratelimited", 429)  # pragma: no cover - loop always returns or raises
@@ -0,0 +1,108 @@
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional
+from urllib.parse import parse_qsl
+from fastapi import Header, HTTPException, Request
+
+from app.slack.service import SLACK_SIGNING_SECRET
+
+SLACK_SIGNATURE_MAX_AGE_SECONDS = 60 * 5
+SLACK_REPLAY_CACHE_SIZE = int(os.getenv("SLACK_REPLAY_CACHE_SIZE", "10000"))
+
+_SIGNING_KEY = SLACK_SIGNING_SECRET.encode("utf-8")
+
+
+@dataclass(frozen=True)
+class SlackRequest:
+    """A verified Slack request: the form fields and, for interactions, the decoded ``payload``."""
+
+    timestamp: int
+    form: Mapping[str, str]
+    payload: Optional[Dict[str, Any]] = None
+
+    @property
+    def team_id(self) -> Optional[str]:
+        if self.payload is not None:
+            return (self.payload.get("team") or {}).get("id")
+        return self.form.get("team_id")
+
+    @property
+    def user_id(self) -> Optional[str]:
+        if self.payload is not None:
+            return (self.payload.get("user") or {}).get("id")
+        return self.form.get("user_id")
+
+
+class SeenSignatures:
+    """Signatures accepted within the freshness window; a second delivery of one is a replay.
+
+    Entries are kept in arrival order, so expired ones are trimmed from the
+    front and the cache never holds more than ``max_size`` signatures.
+    """
+
+    def __init__(self, max_size: int, window_seconds: int):
+        self.max_size = max_size
+        self.window_seconds = window_seconds
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, signature: str) -> bool:
+        """Record ``signature``; returns ``False`` if it was already seen."""
+        now = time.monotonic()
+        with self._lock:
+            while self._entries:
+                oldest, seen_at = next(iter(self._entries.items()))
+                if now - seen_at <= self.window_seconds and len(self._entries) < self.max_size:
+                    break
+                del self._entries[oldest]
+            if signature in self._entries:
+                return False
+            self._entries[signature] = now
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+seen_signatures = SeenSignatures(SLACK_REPLAY_CACHE_SIZE, SLACK_SIGNATURE_MAX_AGE_SECONDS)
+
+
+def signature_for(timestamp: str, body: bytes) -> str:
+    return "v0=" + hmac.new(_SIGNING_KEY, b"v0:" + timestamp.encode() + b":" + body, hashlib.sha256).hexdigest()
+
+
+def parse_slack_body(timestamp: int, body: bytes) -> SlackRequest:
+    form = dict(parse_qsl(body.decode("utf-8"), keep_blank_values=True))
+    raw_payload = form.get("payload")
+    try:
+        payload = json.loads(raw_payload) if raw_payload is not None else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid payload")
+    return SlackRequest(timestamp=timestamp, form=form, payload=payload)
+
+
+async def slack_request(
+    request: Request,
+    x_slack_signature: str = Header(""),
+    x_slack_request_timestamp: str = Header(""),
+) -> SlackRequest:
+    """Dependency for Slack endpoints: read the body once, verify it, parse it once."""
+    body = await request.body()
+    try:
+        timestamp = int(x_slack_request_timestamp)
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Invalid signature")
+    if abs(time.time() - timestamp) > SLACK_SIGNATURE_MAX_AGE_SECONDS:
+        raise HTTPException(status_code=401, detail="Invalid signature")
+    if not hmac.compare_digest(signature_for(x_slack_request_timestamp, body), x_slack_signature):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+    if SLACK_REPLAY_CACHE_SIZE > 0 and not seen_signatures.add(x_slack_signature):
+        raise HTTPException(status_code=401, detail="Replayed request")
+    return parse_slack_body(timestamp, body)
@@ -3,10 +3,12 @@ import json
 import hmac
 import hashlib
 import time
+from datetime import datetime
 from typing import Dict, Any
-import requests
 from fastapi import HTTPException
 
+from app.slack.client import SlackAPIError, api_call
+
 SLACK_CLIENT_ID = os.getenv("SLACK_CLIENT_ID", "client_id")
 SLACK_CLIENT_SECRET = os.getenv("SLACK_CLIENT_SECRET", "client_secret")
 SLACK_SIGNING_SECRET = os.getenv("SLACK_SIGNING_SECRET", "signing_secret")
@@ -30,18 +32,21 @@ def build_install_url() -> str:
     )
 
 
-def exchange_code(code: str) -> Dict[str, Any]:
-    resp = requests.post(
-        "https://slack.com/api/oauth.v2.access",
-        data={
-            "client_id": SLACK_CLIENT_ID,
-            "client_secret": SLACK_CLIENT_SECRET,
-            "code": code,
-            "redirect_uri": SLACK_REDIRECT_URI,
-        },
-        timeout=10,
-    )
-    data = resp.json()
+async def exchange_code(code: str) -> Dict[str, Any]:
+    try:
+        data = await api_call(
+            "oauth.v2.access",
+            data={
+                "client_id": SLACK_CLIENT_ID,
+                "client_secret": SLACK_CLIENT_SECRET,
+                "code": code,
+                "redirect_uri": SLACK_REDIRECT_URI,
+            },
+            # Runs inside the OAuth redirect; the browser should not wait out a rate limit.
+            max_retries=0,
+        )
+    except SlackAPIError as exc:
+        raise HTTPException(status_code=502, detail=exc.error)
     if not data.get("ok"):
         raise HTTPException(status_code=400, detail=data.get("error", "Slack auth failed"))
     return data
@@ -186,3 +191,33 @@ def task_message_blocks(task: Dict[str, Any]) -> list[Dict[str, Any]]:
             ],
         },
     ]
+
+
+def _mrkdwn_escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def task_digest_message(
+    user_id: str, tasks: list[Dict[str, Any]], total: int, overdue: int, now: datetime
+) -> Dict[str, Any]:
+    """``chat.postMessage`` body DMing ``user_id`` their tasks coming due; ``total`` may exceed ``len(tasks)``."""
+    summary = f"You have {total} task{'s' if total != 1 else ''} due soon"
+    if overdue:
+        summary += f" ({overdue} overdue)"
+    lines = []
+    for task in tasks:
+        due = task["due_date"]
+        marker = " :warning: overdue" if due < now else ""
+        # Section text is capped at 3000 characters; keep each line short.
+        title = _mrkdwn_escape(task["title"][:150])
+        lines.append(f"• *{title}* (#{task['id']}, {task['priority']}) due {due:%Y-%m-%d %H:%M}{marker}")
+    if total > len(tasks):
+        lines.append(f"…and {total - len(tasks)} more")
+    return {
+        "channel": user_id,
+        "text": summary,
+        "blocks": [
+            {"type": "section", "text": {"type": "mrkdwn", "text": f"*{summary}*"}},
+            {"type": "section", "text": {"type": "mrkdwn", "text": "\n".join(lines)}},
+        ],
+    }
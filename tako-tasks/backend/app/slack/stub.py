@@ -0,0 +1,43 @@
+"""Minimal stand-in for the Slack Web API used in local testing.
+
+    uvicorn app.slack.stub:app --port 9000
+    SLACK_API_BASE=http://localhost:9000/api python -m app.jobs.worker --drain
+
+Every method answers ``{"ok": true}``, after ``SLACK_STUB_LATENCY_MS`` if set;
+received calls are kept in ``calls`` and can be inspected at ``GET /calls``.
+``users.list`` pages through ``members`` (empty unless a test fills it).
+"""
+import asyncio
+import os
+import time
+from fastapi import FastAPI, Request
+
+# Simulated Slack round-trip time, for load tests.
+latency_seconds = float(os.getenv("SLACK_STUB_LATENCY_MS", "0")) / 1000
+
+app = FastAPI(title="Slack API stub")
+
+calls: list[dict] = []
+members: list[dict] = []
+
+
+def _users_page(form) -> dict:
+    start = int(form.get("cursor") or 0)
+    end = start + int(form.get("limit") or 100)
+    return {"members": members[start:end], "response_metadata": {"next_cursor": str(end) if end < len(members) else ""}}
+
+
+@app.post("/api/{method}")
+async def api_method(method: str, request: Request):
+    body = await request.body()
+    calls.append({"method": method, "authorization": request.headers.get("authorization"), "body": body.decode()})
+    if latency_seconds:
+        await asyncio.sleep(latency_seconds)
+    if method == "users.list":
+        return {"ok": True, **_users_page(await request.form())}
+    return {"ok": True, "ts": f"{time.time():.6f}"}
+
+
+@app.get("/calls")
+def list_calls():
+    return calls
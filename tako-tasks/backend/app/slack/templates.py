@@ -0,0 +1,92 @@
+"""Pre-serialized Slack request bodies.
+
+The modal and the task message are mostly static Block Kit JSON. Each
+template is rendered from the dict builders in ``app.slack.service`` once, at
+import, with ``{{name}}`` holes where per-request values go; a request then
+only escapes its own values and joins byte strings.
+"""
+import json
+import re
+from json.encoder import encode_basestring
+from typing import Any, Dict, List
+
+from app.slack.service import task_message_blocks, task_modal
+
+_HOLE = re.compile(rb"\{\{(\w+)\}\}")
+
+
+def dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _escape(value: Any) -> bytes:
+    """Encode ``value`` the way an f-string would show it, as the inside of a JSON string."""
+    return encode_basestring(f"{value}")[1:-1].encode("utf-8")
+
+
+class Template:
+    """A JSON document split into literal byte chunks around named holes.
+
+    Holes always sit inside JSON strings, so ``render`` takes raw values and
+    escapes them; values listed in ``raw`` are inserted as-is (numbers).
+    """
+
+    def __init__(self, document: Any, raw: tuple[str, ...] = ()):
+        body = dumps(document)
+        for name in raw:
+            # A raw hole was written as a quoted string; drop the quotes so the value lands as a bare number.
+            hole = b"{{" + name.encode() + b"}}"
+            body = body.replace(b'\\"' + hole + b'\\"', hole).replace(b'"' + hole + b'"', hole)
+        parts = _HOLE.split(body)
+        self._literals: List[bytes] = parts[0::2]
+        self._names: List[str] = [name.decode() for name in parts[1::2]]
+        self._raw = frozenset(raw)
+
+    def render(self, **values: Any) -> bytes:
+        chunks = [self._literals[0]]
+        for name, literal in zip(self._names, self._literals[1:]):
+            value = values[name]
+            chunks.append(str(int(value)).encode() if name in self._raw else _escape(value))
+            chunks.append(literal)
+        return b"".join(chunks)
+
+
+TASK_MODAL = Template(task_modal("{{trigger_id}}"))
+
+TASK_MESSAGE = Template(
+    {
+        "channel": "{{channel}}",
+        "text": "New task created: {{title}}",
+        "blocks": task_message_blocks(
+            {
+                "id": "{{task_id}}",
+                "title": "{{title}}",
+                "description": "{{description}}",
+                "assignee_user_id": "{{assignee_user_id}}",
+                "priority": "{{priority}}",
+                "status": "{{status}}",
+                "due_date": "{{due_date}}",
+            }
+        ),
+    },
+    raw=("task_id",),
+)
+
+
+def task_modal_body(trigger_id: str) -> bytes:
+    """``views.open`` body for the create-task modal."""
+    return TASK_MODAL.render(trigger_id=trigger_id)
+
+
+def task_message_body(channel: str, task: Dict[str, Any]) -> bytes:
+    """``chat.postMessage`` body announcing ``task``; ``task`` needs the same keys as ``task_message_blocks``."""
+    return TASK_MESSAGE.render(
+        channel=channel,
+        task_id=task["id"],
+        title=task["title"],
+        description=task["description"],
+        assignee_user_id=task["assignee_user_id"],
+        priority=task["priority"],
+        status=task["status"],
+        due_date=task.get("due_date", "n/a"),
+    )
@@ -0,0 +1,49 @@
+"""Compare two ``benchmarks.load`` result files.
+
+    cd backend
+    python -m benchmarks.compare bench-old.json bench-new.json
+
+Prints throughput, p50/p95/p99 and statements per request for every scenario
+present in both files, with the relative change (negative latency is better).
+"""
+import argparse
+import json
+from typing import Optional
+
+
+def _change(old: Optional[float], new: Optional[float]) -> str:
+    if not old or new is None:
+        return ""
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    with open(args.candidate) as handle:
+        candidate = json.load(handle)
+
+    print(f"baseline  {baseline['meta'].get('commit')}  {baseline['meta'].get('database')}")
+    print(f"candidate {candidate['meta'].get('commit')}  {candidate['meta'].get('database')}")
+    for name, new in candidate["scenarios"].items():
+        old = baseline["scenarios"].get(name)
+        if old is None:
+            continue
+        print(f"\n{name}")
+        rows = [("rps", old["throughput_rps"], new["throughput_rps"])]
+        rows += [(f"{pct} ms", old["latency_ms"][pct], new["latency_ms"][pct]) for pct in ("p50", "p95", "p99")]
+        if old.get("statements_per_request") and new.get("statements_per_request"):
+            rows.append(
+                ("statements", old["statements_per_request"]["mean"], new["statements_per_request"]["mean"])
+            )
+        rows.append(("errors", old["errors"], new["errors"]))
+        for label, before, after in rows:
+            print(f"  {label:<11} {before!s:>10} -> {after!s:>10}  {_change(before, after)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compare the dict-based Slack payload builders with the pre-serialized templates.
+
+    cd backend
+    python -m benchmarks.slack_templates --number 20000
+
+The "dict" numbers include ``json.dumps`` + encode, since that is what the
+HTTP client did with the dicts before sending them.
+"""
+import argparse
+import json
+import timeit
+from datetime import datetime
+
+from app.slack.service import task_message_blocks, task_modal
+from app.slack.templates import task_message_body, task_modal_body
+
+TASK = {
+    "id": 4821,
+    "title": "Prepare Q3 report",
+    "description": "Collect numbers from finance and ops",
+    "assignee_user_id": "U024BE7LH",
+    "priority": "high",
+    "status": "pending",
+    "due_date": datetime(2024, 9, 30),
+}
+
+
+def dict_modal() -> bytes:
+    return json.dumps(task_modal("13345224609.738474920.8088930838d88f008e0")).encode("utf-8")
+
+
+def template_modal() -> bytes:
+    return task_modal_body("13345224609.738474920.8088930838d88f008e0")
+
+
+def dict_message() -> bytes:
+    body = {
+        "channel": "U024BE7LH",
+        "text": f"New task created: {TASK['title']}",
+        "blocks": task_message_blocks(TASK),
+    }
+    return json.dumps(body, default=str).encode("utf-8")
+
+
+def template_message() -> bytes:
+    return task_message_body("U024BE7LH", TASK)
+
+
+CASES = [
+    ("views.open modal", dict_modal, template_modal),
+    ("chat.postMessage task", dict_message, template_message),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, baseline, template in CASES:
+        assert json.loads(baseline()) == json.loads(template()), f"{label}: template output differs"
+        results = {}
+        for name, fn in (("dict", baseline), ("template", template)):
+            best = min(timeit.repeat(fn, number=args.number, repeat=args.repeat))
+            results[name] = best / args.number * 1e6
+        speedup = results["dict"] / results["template"]
+        print(
+            f"{label:<24} dict {results['dict']:7.2f} us  template {results['template']:7.2f} us  "
+            f"({speedup:.1f}x, {len(template())} bytes)"
+        )
+
+
+if __name__ == "__main__":
+    main()
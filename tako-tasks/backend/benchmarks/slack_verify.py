@@ -0,0 +1,115 @@
+"""Per-request overhead of Slack request verification and parsing, before and after.
+
+    cd backend
+    python -m benchmarks.slack_verify --number 20000
+
+"before" is the previous handler code: ``request.body()`` decoded for
+``verify_slack_request`` followed by ``request.form()`` (and ``json.loads`` of
+the payload for interactions). "after" is the ``slack_request`` dependency.
+Replay protection is disabled for the run so one signed body can be reused.
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlencode
+
+from starlette.requests import Request
+
+from app.slack import requests as slack_requests
+from app.slack.service import verify_slack_request
+
+COMMAND = urlencode(
+    {
+        "token": "gIkuvaNzQIHg97ATvDxqgjtO",
+        "team_id": "T0001",
+        "team_domain": "example",
+        "channel_id": "C2147483705",
+        "user_id": "U2147483697",
+        "command": "/task",
+        "text": "create",
+        "response_url": "https://hooks.slack.com/commands/1234/5678",
+        "trigger_id": "13345224609.738474920.8088930838d88f008e0",
+    }
+)
+INTERACTION = urlencode(
+    {
+        "payload": json.dumps(
+            {
+                "type": "block_actions",
+                "team": {"id": "T0001"},
+                "user": {"id": "U2147483697"},
+                "actions": [{"value": json.dumps({"action": "complete", "task_id": 42})}] * 4,
+                "view": {"state": {"values": {f"block_{i}": {"input": {"value": "x" * 40}} for i in range(8)}}},
+            }
+        )
+    }
+)
+
+
+def _request(body: bytes, timestamp: str, signature: str) -> Request:
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/slack/commands",
+        "headers": [
+            (b"content-type", b"application/x-www-form-urlencoded"),
+            (b"x-slack-request-timestamp", timestamp.encode()),
+            (b"x-slack-signature", signature.encode()),
+        ],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request(scope, receive)
+
+
+async def before(request: Request, timestamp: str, signature: str, interaction: bool) -> None:
+    body = await request.body()
+    if not verify_slack_request(timestamp, signature, body.decode()):
+        raise RuntimeError("signature rejected")
+    form = await request.form()
+    if interaction:
+        json.loads(form.get("payload"))
+
+
+async def after(request: Request, timestamp: str, signature: str, interaction: bool) -> None:
+    await slack_requests.slack_request(request, signature, timestamp)
+
+
+async def _time(fn, body: bytes, interaction: bool, number: int) -> float:
+    timestamp = str(int(time.time()))
+    signature = slack_requests.signature_for(timestamp, body)
+    requests = [_request(body, timestamp, signature) for _ in range(number)]
+    started = time.perf_counter()
+    for request in requests:
+        await fn(request, timestamp, signature, interaction)
+    return (time.perf_counter() - started) / number * 1e6
+
+
+async def run(number: int, repeat: int) -> None:
+    slack_requests.SLACK_REPLAY_CACHE_SIZE = 0
+    for label, body, interaction in (
+        ("slash command", COMMAND.encode(), False),
+        ("interaction payload", INTERACTION.encode(), True),
+    ):
+        results = {}
+        for name, fn in (("before", before), ("after", after)):
+            results[name] = min([await _time(fn, body, interaction, number) for _ in range(repeat)])
+        print(
+            f"{label:<20} before {results['before']:7.2f} us  after {results['after']:7.2f} us  "
+            f"({results['before'] / results['after']:.1f}x, {len(body)} byte body)"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.number, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
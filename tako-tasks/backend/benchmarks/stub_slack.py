@@ -0,0 +1,47 @@
+"""Run the Slack API stub (``app.slack.stub``) on a background thread for load tests."""
+import socket
+import threading
+import time
+from collections import Counter
+
+import uvicorn
+
+from app.slack import stub
+
+
+class StubSlackServer:
+    """``base_url`` is what ``SLACK_API_BASE`` should be set to."""
+
+    def __init__(self, latency_ms: float = 0.0, port: int = 0):
+        stub.latency_seconds = latency_ms / 1000
+        self.port = port or _free_port()
+        self._server = uvicorn.Server(
+            uvicorn.Config(stub.app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off")
+        )
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/api"
+
+    def calls(self) -> Counter:
+        return Counter(call["method"] for call in stub.calls)
+
+    def start(self) -> "StubSlackServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Slack API stub did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
@@ -0,0 +1,117 @@
+"""initial schema
+
+Matches the tables previously created by ``Base.metadata.create_all``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+task_status = sa.Enum("pending", "in_progress", "blocked", "review", "done", name="taskstatus")
+job_status = sa.Enum("pending", "running", "done", "dead", name="jobstatus")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "access_keys",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("company", sa.String(), nullable=False),
+        sa.Column("team_size", sa.String(), nullable=False),
+        sa.Column("key_hash", sa.String(), nullable=False),
+        sa.Column("is_used", sa.Boolean(), nullable=True),
+        sa.Column("issued_at", sa.DateTime(), nullable=True),
+        sa.Column("used_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("key_hash"),
+    )
+    op.create_index("ix_access_keys_email", "access_keys", ["email"])
+    op.create_index("ix_access_keys_id", "access_keys", ["id"])
+
+    op.create_table(
+        "workspaces",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("slack_team_id", sa.String(), nullable=False),
+        sa.Column("slack_team_name", sa.String(), nullable=False),
+        sa.Column("bot_token", sa.String(), nullable=False),
+        sa.Column("bot_user_id", sa.String(), nullable=False),
+        sa.Column("access_key_used", sa.String(), nullable=False),
+        sa.Column("installed_at", sa.DateTime(), nullable=True),
+        sa.Column("settings", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_workspaces_id", "workspaces", ["id"])
+    op.create_index("ix_workspaces_slack_team_id", "workspaces", ["slack_team_id"], unique=True)
+
+    op.create_table(
+        "tasks",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("assignee_user_id", sa.String(), nullable=False),
+        sa.Column("creator_user_id", sa.String(), nullable=False),
+        sa.Column("workspace_id", sa.Integer(), nullable=False),
+        sa.Column("priority", sa.String(), nullable=True),
+        sa.Column("status", task_status, nullable=True),
+        sa.Column("due_date", sa.DateTime(), nullable=True),
+        sa.Column("tags", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["workspace_id"], ["workspaces.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_tasks_id", "tasks", ["id"])
+
+    op.create_table(
+        "task_history",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("action", sa.String(), nullable=False),
+        sa.Column("metadata", postgresql.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["task_id"], ["tasks.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_task_history_id", "task_history", ["id"])
+
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("payload", postgresql.JSON(), nullable=True),
+        sa.Column("status", job_status, nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("run_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_jobs_id", "jobs", ["id"])
+    op.create_index("ix_jobs_status_run_at", "jobs", ["status", "run_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("jobs")
+    op.drop_table("task_history")
+    op.drop_table("tasks")
+    op.drop_table("workspaces")
+    op.drop_table("access_keys")
+    job_status.drop(op.get_bind(), checkfirst=True)
+    task_status.drop(op.get_bind(), checkfirst=True)
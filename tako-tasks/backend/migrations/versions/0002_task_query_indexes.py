@@ -0,0 +1,45 @@
+"""task query indexes
+
+Composite indexes for the list_tasks filter/sort combinations, partial
+indexes over open tasks and the missing task_history.task_id index.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN_TASK_PREDICATE = sa.text("status != 'done'")
+
+TASK_INDEXES = [
+    ("ix_tasks_workspace_created", ["workspace_id", "created_at", "id"], None),
+    ("ix_tasks_workspace_assignee_created", ["workspace_id", "assignee_user_id", "created_at", "id"], None),
+    ("ix_tasks_workspace_status_created", ["workspace_id", "status", "created_at", "id"], None),
+    ("ix_tasks_workspace_priority_created", ["workspace_id", "priority", "created_at", "id"], None),
+    ("ix_tasks_workspace_due", ["workspace_id", "due_date"], None),
+    ("ix_tasks_open_workspace_created", ["workspace_id", "created_at", "id"], OPEN_TASK_PREDICATE),
+    ("ix_tasks_open_workspace_assignee", ["workspace_id", "assignee_user_id", "created_at"], OPEN_TASK_PREDICATE),
+    ("ix_tasks_open_workspace_due", ["workspace_id", "due_date"], OPEN_TASK_PREDICATE),
+]
+
+
+def upgrade() -> None:
+    for name, columns, where in TASK_INDEXES:
+        op.create_index(name, "tasks", columns, postgresql_where=where, sqlite_where=where)
+    op.create_index("ix_task_history_task_id", "task_history", ["task_id", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_task_history_task_id", table_name="task_history")
+    for name, _, _ in reversed(TASK_INDEXES):
+        op.drop_index(name, table_name="tasks")
@@ -0,0 +1,86 @@
+"""task tags
+
+Adds the task_tags set table and backfills it from the comma-separated
+tasks.tags strings, which are normalized in the same pass.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+tasks = sa.table(
+    "tasks",
+    sa.column("id", sa.Integer),
+    sa.column("workspace_id", sa.Integer),
+    sa.column("tags", sa.String),
+)
+task_tags = sa.table(
+    "task_tags",
+    sa.column("task_id", sa.Integer),
+    sa.column("tag", sa.String),
+    sa.column("workspace_id", sa.Integer),
+)
+
+
+def _parse(value):
+    names = []
+    for part in (value or "").split(","):
+        name = part.strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def upgrade() -> None:
+    op.create_table(
+        "task_tags",
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("tag", sa.String(), nullable=False),
+        sa.Column("workspace_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["task_id"], ["tasks.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["workspace_id"], ["workspaces.id"]),
+        sa.PrimaryKeyConstraint("task_id", "tag"),
+    )
+
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(tasks.c.id, tasks.c.workspace_id, tasks.c.tags)
+            .where(tasks.c.id > last_id, tasks.c.tags.isnot(None), tasks.c.tags != "")
+            .order_by(tasks.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        links = []
+        for task_id, workspace_id, raw in rows:
+            names = _parse(raw)
+            links.extend({"task_id": task_id, "tag": name, "workspace_id": workspace_id} for name in names)
+            normalized = ",".join(names)
+            if normalized != raw:
+                bind.execute(tasks.update().where(tasks.c.id == task_id).values(tags=normalized))
+        if links:
+            bind.execute(task_tags.insert(), links)
+        last_id = rows[-1][0]
+
+    # Built after the backfill so the bulk insert does not maintain it row by row.
+    op.create_index("ix_task_tags_workspace_tag", "task_tags", ["workspace_id", "tag", "task_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_task_tags_workspace_tag", table_name="task_tags")
+    op.drop_table("task_tags")
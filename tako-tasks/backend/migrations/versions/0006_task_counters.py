@@ -0,0 +1,41 @@
+"""task counters
+
+Per (workspace, assignee, status) task counts behind /tasks/summary,
+backfilled from the existing tasks.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "task_counters",
+        sa.Column("workspace_id", sa.Integer(), nullable=False),
+        sa.Column("assignee_user_id", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["workspace_id"], ["workspaces.id"]),
+        sa.PrimaryKeyConstraint("workspace_id", "assignee_user_id", "status"),
+    )
+    op.execute(
+        "INSERT INTO task_counters (workspace_id, assignee_user_id, status, count) "
+        "SELECT workspace_id, assignee_user_id, COALESCE(CAST(status AS VARCHAR), 'pending'), COUNT(*) "
+        "FROM tasks GROUP BY workspace_id, assignee_user_id, COALESCE(CAST(status AS VARCHAR), 'pending')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("task_counters")
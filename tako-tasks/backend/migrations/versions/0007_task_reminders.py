@@ -0,0 +1,40 @@
+"""task reminders
+
+Per-task ``last_reminded_at`` watermark for the due-date reminder scheduler
+and a partial index over open, dated tasks ordered by due date.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN_DUE_PREDICATE = sa.text("status != 'done' AND due_date IS NOT NULL")
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.add_column(sa.Column("last_reminded_at", sa.DateTime(), nullable=True))
+    op.create_index(
+        "ix_tasks_open_due_id",
+        "tasks",
+        ["due_date", "id"],
+        postgresql_where=OPEN_DUE_PREDICATE,
+        sqlite_where=OPEN_DUE_PREDICATE,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_open_due_id", table_name="tasks")
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_column("last_reminded_at")
@@ -0,0 +1,48 @@
+"""slack user directory
+
+Per-workspace copy of Slack members (``users.list``) used to expand user ids
+into names and avatars, plus the workspace's sync bookkeeping.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "slack_users",
+        sa.Column("workspace_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("real_name", sa.String(), nullable=False),
+        sa.Column("display_name", sa.String(), nullable=False),
+        sa.Column("avatar_url", sa.String(), nullable=False),
+        sa.Column("is_bot", sa.Boolean(), nullable=False),
+        sa.Column("deleted", sa.Boolean(), nullable=False),
+        sa.Column("slack_updated", sa.BigInteger(), nullable=False),
+        sa.Column("synced_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["workspace_id"], ["workspaces.id"]),
+        sa.PrimaryKeyConstraint("workspace_id", "user_id"),
+    )
+    with op.batch_alter_table("workspaces") as batch_op:
+        batch_op.add_column(sa.Column("users_synced_at", sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column("users_sync_requested_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("workspaces") as batch_op:
+        batch_op.drop_column("users_sync_requested_at")
+        batch_op.drop_column("users_synced_at")
+    op.drop_table("slack_users")
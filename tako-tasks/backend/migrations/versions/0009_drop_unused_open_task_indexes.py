@@ -0,0 +1,39 @@
+"""drop unused open-task indexes
+
+``list_tasks`` never filters on the open-task predicate, so the partial
+``(workspace_id, created_at, id)`` and ``(workspace_id, assignee_user_id,
+created_at)`` indexes from 0002 were only write overhead; the full composite
+indexes serve every list plan (see ``scripts/explain_list_tasks.py``).
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN_TASK_PREDICATE = sa.text("status != 'done'")
+
+UNUSED_INDEXES = [
+    ("ix_tasks_open_workspace_created", ["workspace_id", "created_at", "id"]),
+    ("ix_tasks_open_workspace_assignee", ["workspace_id", "assignee_user_id", "created_at"]),
+]
+
+
+def upgrade() -> None:
+    for name, _ in UNUSED_INDEXES:
+        op.drop_index(name, table_name="tasks")
+
+
+def downgrade() -> None:
+    for name, columns in UNUSED_INDEXES:
+        op.create_index(name, "tasks", columns, postgresql_where=OPEN_TASK_PREDICATE, sqlite_where=OPEN_TASK_PREDICATE)
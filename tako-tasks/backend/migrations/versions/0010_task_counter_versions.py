@@ -0,0 +1,31 @@
+"""task counter versions
+
+A ``version`` on every ``task_counters`` row, bumped by each task write, so
+``GET /tasks`` can validate its ETag from the workspace's counter rows instead
+of aggregating the filtered task set.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("task_counters") as batch_op:
+        batch_op.add_column(sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("task_counters") as batch_op:
+        batch_op.drop_column("version")
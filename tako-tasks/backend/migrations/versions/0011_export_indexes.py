@@ -0,0 +1,31 @@
+"""export indexes
+
+Incremental exports filter on ``tasks.updated_at`` / ``task_history.created_at``
+past the resume point; without these they scan the whole workspace (or the
+whole history table) on every resumed export.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_tasks_workspace_updated", "tasks", ["workspace_id", "updated_at", "id"])
+    op.create_index("ix_task_history_created", "task_history", ["created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_task_history_created", table_name="task_history")
+    op.drop_index("ix_tasks_workspace_updated", table_name="tasks")
@@ -0,0 +1,105 @@
+"""Print query plans for every ``list_tasks`` filter combination.
+
+    cd backend
+    python -m scripts.explain_list_tasks --workspace-id 1
+    python -m scripts.explain_list_tasks --analyze --fail-on-seq-scan
+
+Plans are generated from the same query builder the API uses, so an index
+that stops matching after a code change shows up here as a sequential scan.
+"""
+import argparse
+import itertools
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.database import SessionLocal
+from app.models import Task, TaskStatus
+from app.services import tasks as task_service
+from app.services.pagination import encode_cursor
+
+SAMPLE_FILTERS = {
+    "assignee": "U0000000",
+    "status": TaskStatus.in_progress,
+    "priority": "high",
+    "due_date": datetime.utcnow() + timedelta(days=7),
+    "tag": "ops",
+    "search": "report",
+}
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement, analyze: bool = False):
+        self.statement = statement
+        self.analyze = analyze
+
+
+@compiles(Explain, "postgresql")
+def _explain_postgresql(element, compiler, **kw):
+    options = "ANALYZE, BUFFERS" if element.analyze else "COSTS"
+    return f"EXPLAIN ({options}) " + compiler.process(element.statement, **kw)
+
+
+@compiles(Explain)
+def _explain_default(element, compiler, **kw):
+    return "EXPLAIN QUERY PLAN " + compiler.process(element.statement, **kw)
+
+
+def _format_plan(rows) -> str:
+    lines = []
+    for row in rows:
+        # Postgres returns one text column; SQLite returns (id, parent, notused, detail).
+        lines.append(str(row[-1]))
+    return "\n".join(lines)
+
+
+def _is_seq_scan(plan: str) -> bool:
+    return "Seq Scan on tasks" in plan or "SCAN tasks" in plan.replace("SCAN TABLE", "SCAN")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workspace-id", type=int, default=1)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--with-cursor", action="store_true", help="Explain a page after the first one.")
+    parser.add_argument("--analyze", action="store_true", help="Run EXPLAIN ANALYZE (Postgres only).")
+    parser.add_argument("--max-filters", type=int, default=len(SAMPLE_FILTERS))
+    parser.add_argument("--fail-on-seq-scan", action="store_true")
+    args = parser.parse_args()
+
+    names = list(SAMPLE_FILTERS)
+    seq_scans = []
+    db = SessionLocal()
+    try:
+        for size in range(args.max_filters + 1):
+            for combo in itertools.combinations(names, size):
+                filters = {name: SAMPLE_FILTERS[name] for name in combo}
+                query = task_service.filtered_tasks(db, args.workspace_id, task_service.TaskFilters(**filters))
+                if args.with_cursor:
+                    cursor = encode_cursor(datetime.utcnow(), 1_000_000)
+                    query = task_service.after_cursor(query, cursor)
+                statement = query.order_by(Task.created_at.desc(), Task.id.desc()).limit(args.limit).statement
+                plan = _format_plan(db.execute(Explain(statement, analyze=args.analyze)).all())
+                label = ", ".join(combo) or "(no filters)"
+                print(f"=== {label}\n{plan}\n")
+                if _is_seq_scan(plan):
+                    seq_scans.append(label)
+            db.rollback()
+    finally:
+        db.close()
+
+    if seq_scans:
+        print(f"{len(seq_scans)} combination(s) scan the whole tasks table:", file=sys.stderr)
+        for label in seq_scans:
+            print(f"  - {label}", file=sys.stderr)
+        if args.fail_on_seq_scan:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""Recompute task_counters from tasks and report drift.
+
+    cd backend
+    python -m scripts.reconcile_task_counters              # report and fix
+    python -m scripts.reconcile_task_counters --dry-run --fail-on-drift
+    python -m scripts.reconcile_task_counters --enqueue    # let the job worker do it
+
+Counters only drift if a write bypasses the task service (manual SQL, a
+restored backup), so any drift reported here is worth investigating.
+"""
+import argparse
+import sys
+
+from app.database import SessionLocal
+from app.jobs import queue
+from app.jobs.handlers import RECONCILE_TASK_COUNTERS
+from app.services import counters
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workspace-id", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="Report drift without fixing it.")
+    parser.add_argument("--enqueue", action="store_true", help="Queue a reconcile job instead of running it here.")
+    parser.add_argument("--fail-on-drift", action="store_true")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.enqueue:
+            queue.enqueue(db, RECONCILE_TASK_COUNTERS, {"workspace_id": args.workspace_id, "fix": not args.dry_run})
+            db.commit()
+            print("Queued task counter reconciliation.")
+            return 0
+        drift = counters.reconcile(db, args.workspace_id, fix=not args.dry_run)
+    finally:
+        db.close()
+
+    for entry in drift:
+        print(
+            f"workspace={entry.workspace_id} assignee={entry.assignee_user_id} status={entry.status} "
+            f"stored={entry.stored} expected={entry.expected}"
+        )
+    action = "found" if args.dry_run else "fixed"
+    print(f"{len(drift)} counter(s) {action}.", file=sys.stderr)
+    return 1 if drift and args.fail_on_drift else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
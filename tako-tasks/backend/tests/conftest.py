@@ -0,0 +1,81 @@
+import os
+import tempfile
+
+# The engine is built when app.database is imported, so point it at a scratch SQLite file first.
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='tako-tests-')}/tako.db"
+os.environ.setdefault("DB_MODE", "sync")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.models.workspace import Workspace  # noqa: E402
+from app.schema import upgrade_schema  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    upgrade_schema()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def workspace(db):
+    count = db.query(Workspace).count()
+    workspace = Workspace(
+        slack_team_id=f"T{count + 1}",
+        slack_team_name="Test",
+        bot_token="xoxb-test",
+        bot_user_id="UBOT",
+        access_key_used="test",
+    )
+    db.add(workspace)
+    db.commit()
+    return workspace
+
+
+@pytest.fixture
+def client():
+    # Without the lifespan (no warmup or event listener), like a test of the routes alone.
+    from app.main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def auth_headers(client, workspace):
+    response = client.post("/auth/login", data={"username": workspace.slack_team_id, "password": "test"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+class StatementCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __len__(self):
+        return len(self.statements)
+
+    def clear(self):
+        self.statements.clear()
+
+
+@pytest.fixture
+def statements():
+    counter = StatementCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
@@ -0,0 +1,2 @@
+def test_cache_stats_route_is_not_mounted_by_default(client):
+    assert client.get("/internal/cache-stats").status_code == 404
@@ -0,0 +1,89 @@
+"""TASKS_FAST_JSON must render exactly the bytes of the pydantic ``response_model`` path."""
+from datetime import datetime
+
+import pytest
+
+from app.models.task import Task, TaskHistory
+from app.routers import tasks as tasks_router
+
+
+@pytest.fixture
+def seeded(client, db, workspace, auth_headers):
+    ids = []
+    for i in range(12):
+        response = client.post(
+            "/tasks",
+            headers=auth_headers,
+            json={
+                "title": f"Task {i} é \"quoted\" \x01 🚀",
+                "description": "line\nbreak" if i % 3 else "",
+                "assignee_user_id": f"U{i % 3}",
+                "creator_user_id": "U9",
+                "priority": "high" if i % 2 else "normal",
+                "workspace_id": workspace.id,
+                "tags": "Ops, backend" if i % 2 else "",
+                "due_date": "2024-05-01T10:11:12.123456" if i % 2 else None,
+            },
+        )
+        assert response.status_code == 200, response.text
+        ids.append(response.json()["id"])
+    for status in ("in_progress", "done"):
+        client.put(f"/tasks/{ids[0]}", headers=auth_headers, json={"status": status, "tags": ["x", "Y", "x"]})
+    # Rows written before tags were normalized, and history details with mixed JSON types.
+    db.execute(Task.__table__.update().where(Task.id == ids[1]).values(tags=" Foo ,foo,BAR"))
+    db.execute(
+        TaskHistory.__table__.insert().values(
+            task_id=ids[0],
+            user_id="U1",
+            action="commented",
+            metadata={"n": [1, 2.5, None, True], "s": "ü"},
+            created_at=datetime(2024, 1, 1, 0, 0, 0, 5),
+        )
+    )
+    db.commit()
+    return ids
+
+
+def _render(client, monkeypatch, headers, url, fast):
+    monkeypatch.setattr(tasks_router, "TASKS_FAST_JSON", fast)
+    response = client.get(url, headers=headers)
+    return response.status_code, response.headers["content-type"], response.content
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/tasks",
+        "/tasks?limit=5",
+        "/tasks?limit=5&include_total=true",
+        "/tasks?status=done",
+        "/tasks?tag=ops&include_users=true",
+        "/tasks/{0}",
+        "/tasks/{0}?history_limit=1",
+        "/tasks/{1}",
+        "/tasks/{0}/history",
+        "/tasks/{0}/history?limit=1",
+        "/tasks/999999",
+        "/tasks/999999/history",
+    ],
+)
+def test_fast_json_matches_response_model(client, monkeypatch, auth_headers, seeded, url):
+    url = url.format(*seeded)
+    slow = _render(client, monkeypatch, auth_headers, url, fast=False)
+    fast = _render(client, monkeypatch, auth_headers, url, fast=True)
+    assert fast == slow
+
+
+def test_fast_json_matches_on_every_page(client, monkeypatch, auth_headers, seeded):
+    pages = {}
+    for fast in (False, True):
+        monkeypatch.setattr(tasks_router, "TASKS_FAST_JSON", fast)
+        url, bodies = "/tasks?limit=4", []
+        while url:
+            response = client.get(url, headers=auth_headers)
+            bodies.append(response.content)
+            cursor = response.json()["next_cursor"]
+            url = f"/tasks?limit=4&cursor={cursor}" if cursor else None
+        pages[fast] = bodies
+    assert len(pages[False]) == 3
+    assert pages[True] == pages[False]
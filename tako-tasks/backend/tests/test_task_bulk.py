@@ -0,0 +1,131 @@
+from app.models.task import Task, TaskStatus
+from app.models.workspace import Workspace
+from app.schemas.task import TaskBulkRequest
+from app.services import counters
+from app.services import tasks as task_service
+
+NEW_TASK = {"title": "New", "description": "", "assignee_user_id": "U3", "creator_user_id": "U1", "priority": "low"}
+
+
+def _create(db, workspace, **fields):
+    values = {
+        "workspace_id": workspace.id,
+        "title": "Bulk",
+        "description": "",
+        "assignee_user_id": "U2",
+        "creator_user_id": "U1",
+        "tags": "ops",
+        **fields,
+    }
+    return task_service.create_task(db, values, "U1", {"title": values["title"]})
+
+
+def _other_workspace_task(db, workspace):
+    other = Workspace(
+        slack_team_id=f"T-other-{workspace.id}",
+        slack_team_name="Other",
+        bot_token="xoxb-other",
+        bot_user_id="UBOT",
+        access_key_used="test",
+    )
+    db.add(other)
+    db.commit()
+    return _create(db, other)
+
+
+def _batch(workspace, keep, move, drop, foreign, mode):
+    return TaskBulkRequest(
+        mode=mode,
+        operations=[
+            {"op": "create", "data": NEW_TASK},
+            {"op": "update", "id": move.id, "data": {"status": "done", "assignee_user_id": "U4", "tags": ["a", "b"]}},
+            {"op": "update", "id": foreign.id, "data": {"title": "Not mine"}},
+            {"op": "delete", "id": drop.id},
+            {"op": "update", "id": keep.id, "data": {"title": "Renamed"}},
+        ],
+    )
+
+
+def _snapshot(db, workspace):
+    db.expire_all()
+    tasks = db.query(Task).filter(Task.workspace_id == workspace.id).order_by(Task.id).all()
+    return [(task.id, task.title, task.assignee_user_id, task.status, task.tags) for task in tasks]
+
+
+def test_atomic_batch_with_one_failure_writes_nothing(db, workspace):
+    keep, move, drop = (_create(db, workspace) for _ in range(3))
+    foreign = _other_workspace_task(db, workspace)
+    before = _snapshot(db, workspace)
+    version = task_service.list_validator(db, workspace.id)
+
+    response = task_service.apply_bulk(db, workspace.id, "U1", _batch(workspace, keep, move, drop, foreign, "atomic"))
+
+    assert not response.committed
+    assert [result.ok for result in response.results] == [False] * 5
+    assert response.results[2].error == "Task not found"
+    assert all("Not applied" in result.error for index, result in enumerate(response.results) if index != 2)
+    assert _snapshot(db, workspace) == before
+    assert task_service.list_validator(db, workspace.id) == version
+    assert counters.find_drift(db, workspace.id) == []
+
+
+def test_best_effort_batch_applies_the_rest_and_reports_the_failure(db, workspace):
+    keep, move, drop = (_create(db, workspace) for _ in range(3))
+    foreign = _other_workspace_task(db, workspace)
+
+    response = task_service.apply_bulk(
+        db, workspace.id, "U1", _batch(workspace, keep, move, drop, foreign, "best_effort")
+    )
+
+    assert response.committed
+    assert [result.ok for result in response.results] == [True, True, False, True, True]
+    assert response.results[2].index == 2
+    assert response.results[2].error == "Task not found"
+    created_id = response.results[0].id
+    assert response.results[0].task.title == "New"
+    rows = {row[0]: row for row in _snapshot(db, workspace)}
+    assert set(rows) == {keep.id, move.id, created_id}
+    assert rows[keep.id][1] == "Renamed"
+    assert rows[move.id][2:] == ("U4", TaskStatus.done, "a,b")
+    db.expire_all()
+    assert db.get(Task, foreign.id).title == "Bulk"
+    assert counters.find_drift(db) == []
+    assert counters.summary(db, workspace.id)["total"] == 3
+
+
+def test_invalid_items_are_reported_by_index(db, workspace):
+    task = _create(db, workspace)
+    request = TaskBulkRequest(
+        mode="best_effort",
+        operations=[
+            {"op": "update", "data": {"title": "No id"}},
+            {"op": "update", "id": task.id, "data": {"status": "not-a-status"}},
+            {"op": "delete", "id": task.id},
+            {"op": "update", "id": task.id, "data": {"title": "After delete"}},
+        ],
+    )
+
+    response = task_service.apply_bulk(db, workspace.id, "U1", request)
+
+    assert response.committed
+    assert [result.ok for result in response.results] == [False, False, True, False]
+    assert response.results[0].error == "id is required"
+    assert response.results[1].error.startswith("status:")
+    assert response.results[3].error == "Task not found"
+    assert _snapshot(db, workspace) == []
+    assert counters.find_drift(db, workspace.id) == []
+
+
+def test_bulk_update_statements_do_not_grow_with_the_batch(db, workspace, statements):
+    counts = []
+    for size in (5, 25):
+        tasks = [_create(db, workspace) for _ in range(size)]
+        db.expunge_all()
+        request = TaskBulkRequest(
+            operations=[{"op": "update", "id": task.id, "data": {"status": "done", "tags": ["c"]}} for task in tasks]
+        )
+        statements.clear()
+        assert task_service.apply_bulk(db, workspace.id, "U1", request).committed
+        counts.append(len(statements))
+    assert counts[0] == counts[1], statements.statements
+    assert counters.find_drift(db, workspace.id) == []
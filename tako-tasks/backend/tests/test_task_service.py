@@ -0,0 +1,70 @@
+from app.models.task import TaskStatus
+from app.services import counters
+from app.services import tasks as task_service
+
+
+def _create(db, workspace, **fields):
+    values = {
+        "workspace_id": workspace.id,
+        "title": "Write tests",
+        "description": "",
+        "assignee_user_id": "U2",
+        "creator_user_id": "U1",
+        "tags": "backend",
+        **fields,
+    }
+    return task_service.create_task(db, values, "U1", {"title": values["title"]})
+
+
+def test_create_runs_four_statements(db, workspace, statements):
+    # task, task_tags, task_history, task_counters
+    _create(db, workspace)
+    assert len(statements) == 4, statements.statements
+
+
+def test_plain_update_runs_three_statements(db, workspace, statements):
+    task = _create(db, workspace)
+    statements.clear()
+    updated = task_service.update_task(db, workspace.id, task.id, {"title": "Renamed"}, "U1")
+    # UPDATE ... RETURNING, task_history, task_counters (version bump only)
+    assert len(statements) == 3, statements.statements
+    assert updated.title == "Renamed"
+
+
+def test_status_update_runs_four_statements_and_moves_counters(db, workspace, statements):
+    task = _create(db, workspace)
+    statements.clear()
+    updated = task_service.update_task(db, workspace.id, task.id, {"status": TaskStatus.done}, "U1")
+    # locking SELECT, UPDATE ... RETURNING, task_history, task_counters
+    assert len(statements) == 4, statements.statements
+    assert updated.status == TaskStatus.done
+    assert counters.find_drift(db, workspace.id) == []
+
+
+def test_delete_runs_four_statements(db, workspace, statements):
+    task = _create(db, workspace)
+    statements.clear()
+    assert task_service.delete_task(db, workspace.id, task.id)
+    # task_history, task_tags, tasks (RETURNING), task_counters
+    assert len(statements) == 4, statements.statements
+    assert counters.find_drift(db, workspace.id) == []
+
+
+def test_update_of_other_workspace_task_writes_nothing(db, workspace, statements):
+    task = _create(db, workspace)
+    statements.clear()
+    assert task_service.update_task(db, workspace.id + 1000, task.id, {"title": "Nope"}, "U1") is None
+    assert len(statements) == 1, statements.statements
+
+
+def test_every_write_raises_the_list_version(db, workspace):
+    versions = [task_service.list_validator(db, workspace.id)]
+    task = _create(db, workspace)
+    versions.append(task_service.list_validator(db, workspace.id))
+    task_service.update_task(db, workspace.id, task.id, {"title": "Renamed"}, "U1")
+    versions.append(task_service.list_validator(db, workspace.id))
+    task_service.update_task(db, workspace.id, task.id, {"status": TaskStatus.done}, "U1")
+    versions.append(task_service.list_validator(db, workspace.id))
+    task_service.delete_task(db, workspace.id, task.id)
+    versions.append(task_service.list_validator(db, workspace.id))
+    assert versions == sorted(set(versions)), versions